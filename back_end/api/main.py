@@ -2,6 +2,7 @@ from typing import Union
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from screenplay_classes import Script
+from resources import warm_up
 import configue
 from api.utils import (
     Item,
@@ -36,6 +37,13 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def warm_up_resources():
+    """Loads the models and data used to compute the scores when the API starts,
+    rather than when the first script is uploaded."""
+    warm_up(config)
+
+
 @app.post("/api/upload-script/")
 async def upload_script(
     background_task: BackgroundTasks,
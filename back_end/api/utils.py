@@ -15,6 +15,8 @@ class Item(BaseModel):
 
 
 def update_db(script: Script, user_gender: dict = None):
+    # when the script was already scored, only what depends on the genders of its
+    # characters is computed again
     script.bechdel(user_gender)
     score = script.computed_score
     score_2 = script.score2_scenes
@@ -0,0 +1,455 @@
+"""Generates synthetic screenplays, laid out with the indentation conventions the
+naive parsing relies on, along with the true label of each of their lines and the
+score they get at the Bechdel test. They allow to measure how the parsing and the
+Bechdel test scale with the size of the scripts, the number of characters or scenes,
+and how they behave on noisy or pathological layouts (no indentation, hundreds of
+indentation levels, a single giant scene...), without the downloaded corpus."""
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+import pandas as pd
+
+from script_parsing.naive_parsing import label
+
+# usual indentations of the elements of a screenplay, the title page being laid out
+# as the parentheticals and the (CONTINUED) as the page numbers, so that each indent
+# level has a single label
+DESCRIPTION_INDENT = 15
+DIALOGUE_INDENT = 25
+METADATA_INDENT = 31
+CHARACTER_INDENT = 37
+TRANSITION_INDENT = 60
+PAGE_NUMBER_INDENT = 70
+
+DIALOGUE_WIDTH = 35
+DESCRIPTION_WIDTH = 60
+
+# none of these words is in topic_modeling/keywords.json, so that the dialogues
+# built with them are not about men
+NEUTRAL_WORDS = """the a an it we you they this that there here what where why when
+how is are was were will can could would should must have has had do does did go
+went come came see saw know knew think thought want need take took make made find
+found look looked tell told call called house car door window street city night
+day morning evening money time work plan idea problem question answer letter phone
+train road river forest garden kitchen office school hospital party dinner music
+book picture story secret truth chance reason place world weather rain light dark
+cold warm late early quickly slowly maybe really never always again still just
+very too much many some every other same new old good bad big small long short
+right wrong true ready sure""".split()
+MASCULINE_WORDS = ["he", "him", "his", "father", "brother", "boyfriend", "husband"]
+PLACES = ["KITCHEN", "STREET", "OFFICE", "GARDEN", "CAR", "BAR", "HOSPITAL", "ROOF"]
+TIMES = ["DAY", "NIGHT", "MORNING", "EVENING", "CONTINUOUS", "LATER"]
+TRANSITIONS = ["CUT TO:", "DISSOLVE TO:", "FADE OUT.", "SMASH CUT TO:"]
+CHARACTER_EXTENSIONS = [" (O.S.)", " (V.O.)", " (CONT'D)"]
+PARENTHETICALS = ["(quietly)", "(beat)", "(smiling)", "(to herself)", "(laughing)"]
+SYLLABLES = [consonant + vowel for consonant in "BDFGKLMNPRSTVZ" for vowel in "AEIOU"]
+
+
+class SyntheticScript(NamedTuple):
+    """A synthetic screenplay.
+
+    text: text of the screenplay
+    tags: true label of each of its lines (the lines being script.split("\\n")).
+        tag_script gives them back when the lines are indented without jitter,
+        except for the lines added by the noise, which it can't always recognize
+        (e.g. the page numbers are unknown). Without indentation or with jitter,
+        the indent levels don't tell the labels apart anymore.
+    user_genders: gender ("f" or "m") of each character
+    bechdel_score: score of the screenplay at the Bechdel test, for any combination
+        of bechdel_test_rules whose lines_of_dialogues_in_a_row is at most the
+        lines_of_dialogues_in_a_row of the generation, once the screenplay is parsed
+        correctly and the genders of the characters are given by user_genders.
+        It is the score given by Script.bechdel(user_genders) when tag_script gives
+        back the true labels.
+    """
+
+    text: str
+    tags: List[label]
+    user_genders: Dict[str, str]
+    bechdel_score: int
+
+
+class _ScreenplayWriter:
+    """Accumulates the lines of a screenplay along with their labels, indenting
+    them according to the layout of the screenplay."""
+
+    def __init__(
+        self, rng: random.Random, indented: bool, indent_jitter: int, noise: float
+    ):
+        self.rng = rng
+        self.indented = indented
+        self.indent_jitter = indent_jitter
+        self.noise = noise
+        self.lines: List[str] = []
+        self.tags: List[label] = []
+
+    def add_line(self, text: str, tag: label, indent: int, noisy: bool = True):
+        if not self.indented:
+            indent = 0
+        if self.indent_jitter:
+            indent = max(
+                0,
+                indent
+                + self.rng.randint(-1, 1) * self.rng.randint(0, self.indent_jitter),
+            )
+        trailing_spaces = ""
+        if noisy and self.rng.random() < self.noise:
+            trailing_spaces = self.rng.choice([" ", "  ", "\t"])
+        self.lines.append(" " * indent + text + trailing_spaces)
+        self.tags.append(tag)
+
+    def add_empty_line(self):
+        self.lines.append("")
+        self.tags.append(label.EMPTY_LINE)
+
+    def add_paragraph(self, text: str, tag: label, indent: int, width: int):
+        line = ""
+        for word in text.split(" "):
+            if line and len(line) + 1 + len(word) > width:
+                self.add_line(line, tag, indent)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        if line:
+            self.add_line(line, tag, indent)
+
+    def add_noise(self):
+        """Adds, with probability noise, a line usually found in screenplays but
+        not part of the story, or a misplaced empty line."""
+        if self.rng.random() >= self.noise:
+            return
+        kind = self.rng.randrange(3)
+        if kind == 0:
+            self.add_line(
+                f"{len(self.lines) // 55 + 1}.", label.METADATA, PAGE_NUMBER_INDENT
+            )
+        elif kind == 1:
+            self.add_line("(CONTINUED)", label.METADATA, PAGE_NUMBER_INDENT)
+        else:
+            self.add_empty_line()
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def generate_character_names(rng: random.Random, nb_characters: int) -> List[str]:
+    """Returns distinct names of three syllables, so that no name is the beginning
+    of another one."""
+    names = set()
+    while len(names) < nb_characters:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(3)))
+    # the set is sorted to be independent of the hash seed
+    names = sorted(names)
+    rng.shuffle(names)
+    return names
+
+
+def generate_sentence(
+    rng: random.Random,
+    nb_words: int,
+    mentions: List[str] = (),
+    about_men: bool = False,
+    question: bool = False,
+) -> str:
+    words = [rng.choice(NEUTRAL_WORDS) for _ in range(nb_words)]
+    if about_men:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(MASCULINE_WORDS))
+    for mention in mentions:
+        words.insert(rng.randrange(len(words) + 1), mention.capitalize())
+    sentence = " ".join(words)
+    punctuation = rng.choice([".", ".", "!", "?"])
+    return sentence[0].upper() + sentence[1:] + ("?" if question else punctuation)
+
+
+def generate_screenplay(
+    seed: int = 0,
+    nb_scenes: int = 40,
+    nb_characters: int = 12,
+    blocks_per_scene: int = 6,
+    bechdel_score: int = None,
+    nb_women: int = None,
+    noise: float = 0.0,
+    indented: bool = True,
+    indent_jitter: int = 0,
+    lines_of_dialogues_in_a_row: int = 2,
+) -> SyntheticScript:
+    """Generates a screenplay made of a title page followed by scenes, each scene
+    being a heading followed by blocks of descriptions and dialogues and eventually
+    ended by a transition, and by a closing scene.
+
+    The Bechdel score is obtained by construction: every character is mentioned
+    in a dialogue (so they are all named), women never speak one after the other
+    and scenes with several characters always include a man, except in one scene
+    where two women talk to each other (about men for a score of 2, about
+    something else for a score of 3).
+
+    Args:
+        seed (int, optional): seed of the generation. Defaults to 0.
+        nb_scenes (int, optional): number of scenes, one giant scene if 1.
+            Defaults to 40.
+        nb_characters (int, optional): number of characters, at least 3.
+            Defaults to 12.
+        blocks_per_scene (int, optional): average number of dialogues and
+            descriptions in a scene. Defaults to 6.
+        bechdel_score (int, optional): score of the screenplay at the Bechdel test.
+            Defaults to a random score.
+        nb_women (int, optional): number of women among the characters, at most 1
+            for a score of 0 and at least 2 otherwise. Defaults to about half of the
+            characters.
+        noise (float, optional): probability of adding lines which are not part
+            of the story (page numbers, (CONTINUED)...), misplaced empty lines or
+            trailing whitespaces. Defaults to 0.
+        indented (bool, optional): whether the lines are indented, the lines all
+            start at the beginning of the line if False. Defaults to True.
+        indent_jitter (int, optional): maximum random shift of the indentation of
+            each line, large values give hundreds of indentation levels.
+            Defaults to 0.
+        lines_of_dialogues_in_a_row (int, optional): the scene where two women
+            talk to each other is long enough to validate the soft criteria of the
+            Bechdel test with this value of lines_of_dialogues_in_a_row.
+            Defaults to 2.
+
+    Returns:
+        SyntheticScript: the screenplay along with its true labels, the gender of
+            its characters and its Bechdel score.
+    """
+    rng = random.Random(seed)
+    if bechdel_score is None:
+        bechdel_score = rng.randrange(4)
+    if bechdel_score not in range(4):
+        raise ValueError(f"bechdel_score must be between 0 and 3, got {bechdel_score}")
+    if nb_characters < 3:
+        raise ValueError(f"nb_characters must be at least 3, got {nb_characters}")
+    if nb_women is None:
+        # two women and a man at least for a score above 0
+        nb_women = max(2, nb_characters // 2) if bechdel_score > 0 else rng.randrange(2)
+    if (bechdel_score == 0) != (nb_women < 2) or not 0 <= nb_women < nb_characters:
+        raise ValueError(
+            f"Cannot have {nb_women} women among {nb_characters} characters "
+            f"for a Bechdel score of {bechdel_score}"
+        )
+
+    names = generate_character_names(rng, nb_characters)
+    women, men = names[:nb_women], names[nb_women:]
+    user_genders = {name: "f" for name in women}
+    user_genders.update({name: "m" for name in men})
+    # characters which have not been mentioned in a dialogue yet
+    not_named = list(names)
+    rng.shuffle(not_named)
+    # characters which have not spoken yet
+    not_introduced = list(names)
+    rng.shuffle(not_introduced)
+
+    writer = _ScreenplayWriter(rng, indented, indent_jitter, noise)
+    for text in ["UNTITLED SYNTHETIC SCREENPLAY", "Written by", "A Generator"]:
+        writer.add_line(text, label.METADATA, METADATA_INDENT)
+        writer.add_empty_line()
+
+    # characters who already spoke, the first time a character speaks their name is
+    # written as is, since the name has to be found as is in the dialogues for the
+    # character to be considered as named
+    introduced = set()
+    # the naive parsing labels the indent levels from the scenes other than the
+    # first and the last ones, here the scenes of the story, and only recognizes the
+    # dialogues by their question marks and the parentheticals by their parentheses,
+    # so the story has at least one question and one parenthetical
+    has_question = has_parenthetical = False
+
+    def add_dialogue(
+        speaker: str, mentions: List[str], about_men: bool, with_markers: bool = False
+    ):
+        nonlocal has_question, has_parenthetical
+        if speaker in introduced:
+            writer.add_line(
+                speaker + rng.choice([""] * 6 + CHARACTER_EXTENSIONS),
+                label.CHARACTER,
+                CHARACTER_INDENT,
+            )
+        else:
+            writer.add_line(speaker, label.CHARACTER, CHARACTER_INDENT, noisy=False)
+            introduced.add(speaker)
+        if rng.random() < 0.15 or with_markers:
+            writer.add_line(rng.choice(PARENTHETICALS), label.METADATA, METADATA_INDENT)
+            has_parenthetical = True
+        sentences = [
+            generate_sentence(rng, rng.randint(2, 12), about_men=about_men)
+            for _ in range(rng.randint(0, 2))
+        ]
+        sentences.append(
+            generate_sentence(
+                rng, rng.randint(2, 12), mentions, about_men, question=with_markers
+            )
+        )
+        rng.shuffle(sentences)
+        has_question = has_question or any(
+            sentence.endswith("?") for sentence in sentences
+        )
+        writer.add_paragraph(
+            " ".join(sentences), label.DIALOGUE, DIALOGUE_INDENT, DIALOGUE_WIDTH
+        )
+        writer.add_empty_line()
+        writer.add_noise()
+
+    def add_description():
+        sentences = [
+            generate_sentence(rng, rng.randint(4, 14), [rng.choice(names)])
+            for _ in range(rng.randint(1, 3))
+        ]
+        writer.add_paragraph(
+            " ".join(sentences),
+            label.SCENES_DESCRIPTION,
+            DESCRIPTION_INDENT,
+            DESCRIPTION_WIDTH,
+        )
+        writer.add_empty_line()
+        writer.add_noise()
+
+    women_scene = rng.randrange(nb_scenes) if bechdel_score >= 2 else None
+    for scene_index in range(nb_scenes):
+        writer.add_line(
+            f"{rng.choice(['INT.', 'EXT.'])} {rng.choice(PLACES)} - {rng.choice(TIMES)}",
+            label.SCENES_BOUNDARY,
+            DESCRIPTION_INDENT,
+        )
+        writer.add_empty_line()
+        nb_blocks = max(1, round(rng.expovariate(1 / blocks_per_scene)))
+        # the first dialogue of the last scene of the story has the markers the
+        # story doesn't have yet
+        with_markers = scene_index == nb_scenes - 1 and not (
+            has_question and has_parenthetical
+        )
+        if scene_index == women_scene:
+            # two women talking to each other, and nobody else
+            first_woman, second_woman = rng.sample(women, 2)
+            add_description()
+            for i in range(max(nb_blocks, lines_of_dialogues_in_a_row + 2)):
+                add_dialogue(
+                    first_woman if i % 2 == 0 else second_woman,
+                    (
+                        [rng.choice(men)]
+                        if bechdel_score == 2 and rng.random() < 0.3
+                        else []
+                    ),
+                    about_men=bechdel_score == 2,
+                    with_markers=with_markers and i == 0,
+                )
+        else:
+            # a man, eventually with other characters, and never two women speaking
+            # one after the other
+            cast = [rng.choice(men)] + rng.sample(names, rng.randint(0, 2))
+            # the characters who haven't spoken yet are preferred
+            while not_introduced and not_introduced[-1] in introduced:
+                not_introduced.pop()
+            if len(cast) > 1 and not_introduced:
+                cast[1] = not_introduced.pop()
+            last_speaker = None
+            for _ in range(nb_blocks):
+                if rng.random() < 0.3 and not with_markers:
+                    add_description()
+                    continue
+                if user_genders.get(last_speaker) == "f":
+                    speaker = cast[0]
+                else:
+                    speaker = rng.choice(cast)
+                mentions = [not_named.pop()] if not_named else []
+                add_dialogue(
+                    speaker,
+                    mentions,
+                    about_men=rng.random() < 0.5,
+                    with_markers=with_markers,
+                )
+                with_markers = False
+                last_speaker = speaker
+        if rng.random() < 0.3:
+            writer.add_line(
+                rng.choice(TRANSITIONS), label.SCENES_BOUNDARY, TRANSITION_INDENT
+            )
+            writer.add_empty_line()
+
+    # the characters who haven't spoken yet speak in a closing scene, each one after
+    # a man, who mentions the characters not mentioned yet. It is always written so
+    # that the last scene of the story is used to label the indent levels
+    not_introduced = [name for name in names if name not in introduced]
+    writer.add_line("EXT. STREET - NIGHT", label.SCENES_BOUNDARY, DESCRIPTION_INDENT)
+    writer.add_empty_line()
+    for speaker in not_introduced or [men[0]]:
+        add_dialogue(men[0], not_named[-3:], about_men=True)
+        del not_named[-3:]
+        if speaker != men[0]:
+            add_dialogue(speaker, [], about_men=True)
+    while not_named:
+        add_dialogue(men[0], not_named[-3:], about_men=True)
+        del not_named[-3:]
+    writer.add_line("THE END", label.METADATA, METADATA_INDENT)
+
+    return SyntheticScript(writer.text(), writer.tags, user_genders, bechdel_score)
+
+
+def generate_corpus(
+    folder: str, nb_scripts: int, seed: int = 0, **generation_parameters
+) -> pd.DataFrame:
+    """Generates screenplays of random Bechdel scores and saves them in a folder,
+    with a dataset in the format of config["names"]["db_name"] (a path and a rating
+    column) extended with the gender of the characters.
+    The true labels of the lines of each screenplay are saved next to it, with the
+    .tags extension, one label name per line.
+
+    Args:
+        folder (str): folder where the corpus is saved
+        nb_scripts (int): number of screenplays
+        seed (int, optional): seed of the generation. Defaults to 0.
+        generation_parameters: parameters of generate_screenplay
+
+    Returns:
+        pd.DataFrame: the dataset of the corpus, also saved as dataset.csv
+    """
+    os.makedirs(folder, exist_ok=True)
+    rows = []
+    for i in range(nb_scripts):
+        script = generate_screenplay(seed=seed + i, **generation_parameters)
+        script_path = os.path.join(folder, f"synthetic_{seed + i}.txt")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(script.text)
+        with open(script_path[: -len(".txt")] + ".tags", "w", encoding="utf-8") as f:
+            f.write("\n".join(tag.name for tag in script.tags))
+        rows.append(
+            {
+                "title": f"Synthetic {seed + i}",
+                "path": script_path,
+                "rating": script.bechdel_score,
+                "user_genders": json.dumps(script.user_genders),
+            }
+        )
+    dataset = pd.DataFrame(rows)
+    dataset.to_csv(os.path.join(folder, "dataset.csv"), index=False)
+    return dataset
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", type=str, default="data/input/synthetic/")
+    parser.add_argument("--nb_scripts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nb_scenes", type=int, default=40)
+    parser.add_argument("--nb_characters", type=int, default=12)
+    parser.add_argument("--blocks_per_scene", type=int, default=6)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--not_indented", action="store_true")
+    parser.add_argument("--indent_jitter", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_corpus(
+        args.folder,
+        args.nb_scripts,
+        seed=args.seed,
+        nb_scenes=args.nb_scenes,
+        nb_characters=args.nb_characters,
+        blocks_per_scene=args.blocks_per_scene,
+        noise=args.noise,
+        indented=not args.not_indented,
+        indent_jitter=args.indent_jitter,
+    )
@@ -1,4 +1,10 @@
+import argparse
+import hashlib
+import pickle
 import string
+import sys
+from typing import Dict, List, Tuple
+import configue
 import nltk
 import nltk.classify
 import pandas as pd
@@ -26,7 +32,7 @@ def load_database(config: dict) -> pd.DataFrame:
         config["paths"]["input_folder_name"], config["names"]["list_prenoms"]
     )
 
-    if config["names"]["list_prenoms"] not in config["paths"]["input_folder_name"]:
+    if not os.path.exists(path):
         url = "https://www.data.gouv.fr/fr/datasets/r/55cd803a-998d-4a5c-9741-4cd0ee0a7699"
         r = requests.get(url, allow_redirects=True)
         open(path, "wb").write(r.content)
@@ -47,8 +53,63 @@ def load_database(config: dict) -> pd.DataFrame:
     return gender_data
 
 
-def create_test_train(gender_data: pd.DataFrame):
-    """This function creates the train and test set for the classifier."""
+# to increment when the format of the name index changes
+NAME_INDEX_VERSION = 1
+
+
+def build_name_index(config: dict) -> Dict[str, str]:
+    """This function compiles the name to gender database into a dictionary from each
+    name to its gender, and saves it so that the database doesn't need to be read
+    again. For a name appearing several times in the database, the first gender is kept.
+    """
+    gender_data = load_database(config)
+    name_index = {}
+    for name, gender in zip(gender_data["name"].values, gender_data["gender"].values):
+        # the few distinct genders are shared by all the names
+        name_index.setdefault(name, sys.intern(gender))
+
+    path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["name_index"]
+    )
+    # written under another name then renamed, so that an index being written
+    # cannot be read by another process
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(
+            {"version": NAME_INDEX_VERSION, "name_index": name_index},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(temporary_path, path)
+    return name_index
+
+
+def load_name_index(config: dict) -> Dict[str, str]:
+    """This loads the dictionary from each name to its gender, building it from the
+    name to gender database if it doesn't exist yet or if the database changed."""
+    path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["name_index"]
+    )
+    database_path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["list_prenoms"]
+    )
+    if os.path.exists(path) and (
+        not os.path.exists(database_path)
+        or os.path.getmtime(path) >= os.path.getmtime(database_path)
+    ):
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved["version"] == NAME_INDEX_VERSION:
+                return saved["name_index"]
+        except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+            pass
+    return build_name_index(config)
+
+
+def split_test_train(gender_data: pd.DataFrame) -> Tuple[list, list]:
+    """This function splits the database into lists of (name, gender) tuples for the
+    train and test sets."""
     # Create the X and Y vectors, equal to the name and gender columns
     X = gender_data.iloc[:, :1]
     Y = gender_data.iloc[:, 1:]
@@ -58,17 +119,21 @@ def create_test_train(gender_data: pd.DataFrame):
         X, Y, test_size=0.3, random_state=0
     )
 
-    # Create the train dataframe, transform it into a list of tuples.
+    # Create the train and test dataframes, transform them into lists of tuples.
     train = pd.merge(X_train, y_train, right_index=True, left_index=True)
     train = list(train.itertuples(index=False, name=None))
-    # Apply _gender_features to the names in train.
+    test = pd.merge(X_test, y_test, right_index=True, left_index=True)
+    test = list(test.itertuples(index=False, name=None))
+    return train, test
+
+
+def create_test_train(gender_data: pd.DataFrame):
+    """This function creates the train and test set for the classifier."""
+    train, test = split_test_train(gender_data)
+    # Apply _gender_features to the names in train and test.
     train_features = nltk.classify.apply_features(
         create_gender_features, train, labeled=True
     )
-
-    # Do the same for the test set.
-    test = pd.merge(X_test, y_test, right_index=True, left_index=True)
-    test = list(test.itertuples(index=False, name=None))
     test_features = nltk.classify.apply_features(
         create_gender_features, test, labeled=True
     )
@@ -81,9 +146,11 @@ def create_gender_features(name: str) -> dict:
     features = {}
     features["last_letter"] = name[-1].lower()
     features["first_letter"] = name[0].lower()
+    lower_name = name.lower()
     for letter in string.ascii_lowercase:
-        features["count(%s)" % letter] = name.lower().count(letter)
-        features["has(%s)" % letter] = letter in name.lower()
+        count = lower_name.count(letter)
+        features["count(%s)" % letter] = count
+        features["has(%s)" % letter] = count > 0
     # names ending in -yn are mostly female, names ending in -ch ar mostly male, so add 2 more features
     features["suffix2"] = name[-2:]
     features["suffix3"] = name[-3:]
@@ -91,35 +158,133 @@ def create_gender_features(name: str) -> dict:
     return features
 
 
-def load_classifier(config: dict):
-    """This loads the classifier"""
+# to increment when the training of the classifier changes, so that the classifiers
+# trained before are trained again
+CLASSIFIER_VERSION = 1
+
+
+def hash_database(config: dict) -> str:
+    """This returns the hash of the name to gender database the classifier is trained on."""
+    path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["list_prenoms"]
+    )
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def train_classifier(config: dict):
+    """This trains the classifier on the training set and saves it, along with the hash
+    of the database it was trained on."""
     gender_data = load_database(config)
-    # Create the train and test features sets, and train a Naive bayes classifier on the training set.
-    train_features, test_features = create_test_train(gender_data)
+    # Train a Naive bayes classifier on the features of the training set.
+    train, _ = split_test_train(gender_data)
+    train_features = nltk.classify.apply_features(
+        create_gender_features, train, labeled=True
+    )
     classifier = nltk.NaiveBayesClassifier.train(train_features)
+
+    path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["name_classifier"]
+    )
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(
+            {
+                "version": CLASSIFIER_VERSION,
+                "database_hash": hash_database(config),
+                "classifier": classifier,
+            },
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(temporary_path, path)
     return classifier
 
 
-def _classify(name: str, classifier) -> tuple:
-    """Given a name and a classifier, this returns the predicted ouput, and the probability"""
+def load_classifier(config: dict):
+    """This loads the classifier saved by train_classifier, training it first if it
+    wasn't trained yet or if it was trained on another version of the database.
+    The saved classifier is used on its own when the database isn't available."""
+    path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["name_classifier"]
+    )
+    database_path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["list_prenoms"]
+    )
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved["version"] == CLASSIFIER_VERSION and (
+                not os.path.exists(database_path)
+                or saved["database_hash"] == hash_database(config)
+            ):
+                return saved["classifier"]
+        except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+            pass
+    return train_classifier(config)
+
+
+def _keyword_guess(name: str) -> Tuple[str, float]:
     # The following two conditions cover the instances where a character is called Mrs. something or Mr. something.
     if any(ele in name for ele in keywords["f"]):
-        guess = "f"
-        prob = 1
-    elif any(ele in name for ele in keywords["m"]):
-        guess = "m"
-        prob = 1
+        return "f", 1
+    if any(ele in name for ele in keywords["m"]):
+        return "m", 1
+    return None
+
+
+def _distribution_guess(dist) -> Tuple[str, float]:
+    m, f, b = dist.prob("m"), dist.prob("f"), dist.prob("f,m")
+    d = {m: "m", f: "f", b: "f,m"}
+    # If the name was most likely mixed, we select the next most likely gender.
+    prob = max(m, f)
+    return d[prob], prob
+
+
+def _classify(name: str, classifier) -> tuple:
+    """Given a name and a classifier, this returns the predicted ouput, and the probability"""
+    guess = _keyword_guess(name)
     # The following statement covers all other instances, and uses the classifier.
-    else:
+    if guess is None:
         _name = create_gender_features(name.split()[0])
-        dist = classifier.prob_classify(_name)
-        m, f, b = dist.prob("m"), dist.prob("f"), dist.prob("f,m")
-        d = {m: "m", f: "f", b: "f,m"}
-        # If the name was most likely mixed, we select the next most likely gender.
-        prob = max(m, f)
-        guess = d[prob]
-    return guess, prob
+        guess = _distribution_guess(classifier.prob_classify(_name))
+    return guess
+
+
+def classify_many(names: List[str], classifier) -> List[Tuple[str, float]]:
+    """Given names and a classifier, this returns the predicted output and the probability
+    of each name, as _classify does. The features of each distinct first name are only
+    computed once, and all of them are classified at once."""
+    guesses = [_keyword_guess(name) for name in names]
+    first_names = list(
+        dict.fromkeys(
+            name.split()[0] for name, guess in zip(names, guesses) if guess is None
+        )
+    )
+    distributions = classifier.prob_classify_many(
+        [create_gender_features(first_name) for first_name in first_names]
+    )
+    first_names_guesses = {
+        first_name: _distribution_guess(dist)
+        for first_name, dist in zip(first_names, distributions)
+    }
+    return [
+        guess if guess is not None else first_names_guesses[name.split()[0]]
+        for name, guess in zip(names, guesses)
+    ]
 
 
 if __name__ == "__main__":
-    classifier = load_classifier()
+    parser = argparse.ArgumentParser(
+        description="Builds the name to gender index and trains the gender classifier."
+    )
+    parser.add_argument("--parameters_path", type=str, default="parameters.yaml")
+    args = parser.parse_args()
+
+    config = configue.load(args.parameters_path)
+    build_name_index(config)
+    train_classifier(config)
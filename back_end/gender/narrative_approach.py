@@ -1,7 +1,11 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Union
 import pandas as pd
 import nltk
 import os
 
+from topic_modeling.multi_pattern import MultiPatternMatcher
+
 """Given a list of narrative passages, this function identifies the most frequently used gendered pronouns included in 
 paragraphs where the character's name appears. Then, we use the most frequent gender associated with narrative passages as our
 prediction."""
@@ -20,27 +24,70 @@ def import_gender_tokens(config: dict) -> pd.DataFrame:
     return tokens
 
 
-def naive_narrative_gender(paragraphs: list, name: str, tokens: pd.DataFrame) -> str:
+class GenderTokens:
+    """
+    Hash map from each gendered token to its gender, built from the gendered tokens
+    dataframe."""
+
+    def __init__(self, tokens: pd.DataFrame):
+        # a token appearing several times in the dataframe has the gender of its first
+        # row, and each of its occurrences in a paragraph is counted once per row
+        self.gender: Dict[str, str] = {}
+        for token, gen in zip(tokens[0], tokens[1]):
+            self.gender.setdefault(token, gen)
+        self.nb_rows = Counter(tokens[0])
+        # in case of a tie, the gender of the first tokens of the dataframe is kept
+        self.genders = list(dict.fromkeys(self.gender.values()))
+
+    def paragraph_gender(self, paragraph: str) -> str:
+        """
+        Given a paragraph, this returns the gender associated with the most frequent
+        gendered tokens present in it."""
+        freq = dict.fromkeys(self.genders, 0)
+        for word in nltk.word_tokenize(paragraph):
+            word = word.lower()
+            if word in self.gender:
+                freq[self.gender[word]] += self.nb_rows[word]
+        return max(freq, key=lambda k: freq[k])
+
+
+def naive_narrative_gender(
+    paragraphs: list, name: str, tokens: Union[pd.DataFrame, GenderTokens]
+) -> str:
     """
     Given a list of paragraphs, a character name, and a gendered tokens dataframe,
     this function returns the gender associated with the most frequent pronouns present in
     paragraphs where the character is named."""
-    freq_gender = {"m": 0, "f": 0, "nb": 0}
-    paragraphs = [para for para in paragraphs if name in para]
-    for para in paragraphs:
-        freq_tokens = dict.fromkeys(tokens[0], 0)
-        freq = {}
-        for word in nltk.word_tokenize(para):
-            for token in tokens[0]:
-                if token == word.lower():
-                    freq_tokens[token] += 1
-        for key in freq_tokens.keys():
-            gen = tokens.loc[tokens[0] == key][1].values[0]
-            value = freq_tokens[key]
-            try:
-                freq[gen] += value
-            except:
-                freq[gen] = value
-        freq_gender[max(freq, key=lambda k: freq[k])] += 1
-    res = max(freq_gender, key=lambda k: freq_gender[k])
-    return res
+    return naive_narrative_genders(paragraphs, [name], tokens)[name]
+
+
+def naive_narrative_genders(
+    paragraphs: list,
+    names: Iterable[str],
+    tokens: Union[pd.DataFrame, GenderTokens],
+    paragraphs_genders: List[str] = None,
+) -> Dict[str, str]:
+    """
+    Given a list of paragraphs, character names, and a gendered tokens dataframe, this
+    function returns the gender of each character as naive_narrative_gender does, finding
+    the names present in each paragraph in a single scan of the paragraph.
+    The gender of each paragraph is read from paragraphs_genders (None if unknown) if
+    given, and saved there once computed, so that it is computed once across calls."""
+    if not isinstance(tokens, GenderTokens):
+        tokens = GenderTokens(tokens)
+    freq_gender = {name: {"m": 0, "f": 0, "nb": 0} for name in names}
+    matcher = MultiPatternMatcher(freq_gender)
+    for i, para in enumerate(paragraphs):
+        names_in_para = matcher.find_all(para)
+        if names_in_para:
+            if paragraphs_genders is None:
+                gen = tokens.paragraph_gender(para)
+            else:
+                gen = paragraphs_genders[i]
+                if gen is None:
+                    gen = paragraphs_genders[i] = tokens.paragraph_gender(para)
+            for name in names_in_para:
+                freq_gender[name][gen] += 1
+    return {
+        name: max(freq, key=lambda k: freq[k]) for name, freq in freq_gender.items()
+    }
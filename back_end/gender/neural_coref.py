@@ -1,23 +1,94 @@
+import hashlib
+import inspect
+import json
+import os
 from tqdm import tqdm_notebook
-from typing import List
+from typing import Dict, Iterable, List, Set, Union
+
+from topic_modeling.multi_pattern import MultiPatternMatcher
 
 MODEL_URL = "https://github.com/huggingface/neuralcoref-models/releases/download/en_coref_md-3.0.0/en_coref_md-3.0.0.tar.gz"
 
+# to increment when the coreference resolution changes, so that the results computed
+# before are not used anymore
+COREF_CACHE_VERSION = 1
+
 
-def list_pronouns_coref(list_text: List[str], nlp) -> dict:
-    "Given a list of strings, returns a dictionary with names as keyrs and coreferences as values."
+def list_pronouns_coref(
+    list_text: List[str], nlp, batch_size: int = 64, n_process: int = 1
+) -> Dict[str, Set[str]]:
+    """Given a list of strings, returns a dictionary with names as keys and coreferences as values.
+    The strings are streamed through the pipeline in batches of batch_size, on n_process
+    processes if the installed spaCy version supports it."""
+    pipe_kwargs = {"batch_size": batch_size}
+    if n_process != 1 and "n_process" in inspect.signature(nlp.pipe).parameters:
+        pipe_kwargs["n_process"] = n_process
     dico = {}
-    for text in list_text:
-        doc = nlp(text)
+    for doc in nlp.pipe(list_text, **pipe_kwargs):
         if doc._.has_coref:
-            clusters = doc._.coref_clusters
-            for i in range(len(clusters)):
-                if str(clusters[i].main) in dico.keys():
-                    pronouns = clusters[i].mentions + list(dico[str(clusters[i].main)])
-                    dico[str(clusters[i].main)] = pronouns
-                else:
-                    dico[str(clusters[i].main)] = clusters[i].mentions
-    for k in dico.keys():
-        dico[k] = map(str, dico[k])
-        dico[k] = set(dico[k])
+            for cluster in doc._.coref_clusters:
+                dico.setdefault(str(cluster.main), set()).update(
+                    map(str, cluster.mentions)
+                )
     return dico
+
+
+def select_paragraphs(
+    list_text: List[str], names: Iterable[str], window: int = 0
+) -> List[str]:
+    """Given a list of strings and character names, returns the strings in which one of
+    the names appears, regardless of case, along with the window strings before and after
+    each of them.
+    Each string is resolved separately, so the coreferences of a character, whose main
+    mention contains its name, are all found in the strings naming it."""
+    matcher = MultiPatternMatcher(name.lower() for name in names)
+    selected = [False] * len(list_text)
+    for i, text in enumerate(list_text):
+        if matcher.find_all(text.lower()):
+            for j in range(max(0, i - window), min(len(list_text), i + window + 1)):
+                selected[j] = True
+    return [text for text, is_selected in zip(list_text, selected) if is_selected]
+
+
+def is_coref_cache_enabled(config: dict) -> bool:
+    return config.get("coref_cache", {}).get("enabled", False)
+
+
+def get_coref_cache_path(list_text: List[str], config: dict) -> str:
+    """Returns the path of the coreferences of a narration in the cache, which depends on
+    the content of the narration and on the coreference model."""
+    sha = hashlib.sha256(
+        json.dumps(
+            {"version": COREF_CACHE_VERSION, "model": MODEL_URL, "texts": list_text}
+        ).encode("utf-8", errors="surrogatepass")
+    )
+    return os.path.join(config["coref_cache"]["folder"], f"{sha.hexdigest()}.json")
+
+
+def load_cached_coref(
+    list_text: List[str], config: dict
+) -> Union[Dict[str, Set[str]], None]:
+    """Returns the coreferences of a narration saved in the cache, or None if they are
+    not in the cache."""
+    if not is_coref_cache_enabled(config):
+        return None
+    try:
+        with open(get_coref_cache_path(list_text, config), encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {name: set(mentions) for name, mentions in cached.items()}
+
+
+def save_coref(list_text: List[str], config: dict, pronouns: Dict[str, Set[str]]):
+    """Saves the coreferences of a narration in the cache."""
+    if not is_coref_cache_enabled(config):
+        return
+    cache_path = get_coref_cache_path(list_text, config)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # written under another name then renamed, so that coreferences being written
+    # cannot be read by another process
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as f:
+        json.dump({name: sorted(mentions) for name, mentions in pronouns.items()}, f)
+    os.replace(temporary_path, cache_path)
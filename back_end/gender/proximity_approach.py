@@ -0,0 +1,46 @@
+import re
+from typing import Dict, Iterable, List
+
+from gender.narrative_approach import GenderTokens
+
+"""Given a list of narrative passages, this function counts the gendered pronouns found in the
+few words following each mention of a character. Then, we use the most frequent gender as our
+prediction. Unlike the narrative and coref approaches, it only needs a regex tokenizer."""
+
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+
+def proximity_genders(
+    paragraphs: List[str],
+    names: Iterable[str],
+    tokens: GenderTokens,
+    window: int = 6,
+) -> Dict[str, str]:
+    """
+    Given a list of paragraphs, character names, and gendered tokens, this function returns
+    for each character the gender associated with the most frequent gendered tokens among the
+    window words following its mentions, regardless of case.
+    The paragraphs are tokenized once for all the characters."""
+    freq_gender = {name: {"m": 0, "f": 0, "nb": 0} for name in names}
+    # the names are indexed by their first word, and matched word by word
+    names_by_first_word: Dict[str, list] = {}
+    for name in freq_gender:
+        words = tuple(WORD_PATTERN.findall(name.lower()))
+        if words:
+            names_by_first_word.setdefault(words[0], []).append((words, name))
+
+    for para in paragraphs:
+        words = WORD_PATTERN.findall(para.lower())
+        for i, word in enumerate(words):
+            for name_words, name in names_by_first_word.get(word, ()):
+                end = i + len(name_words)
+                if tuple(words[i:end]) != name_words:
+                    continue
+                freq = freq_gender[name]
+                for following_word in words[end : end + window]:
+                    gen = tokens.gender.get(following_word)
+                    if gen is not None:
+                        freq[gen] += tokens.nb_rows[following_word]
+    return {
+        name: max(freq, key=lambda k: freq[k]) for name, freq in freq_gender.items()
+    }
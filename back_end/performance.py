@@ -1,10 +1,15 @@
+import copy
 import os
+import time
 
 import pandas as pd
 from tqdm import tqdm
 from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
 
-from screenplay_classes import Script
+from screenplay_classes import GENDER_METHODS, Script
+from script_parsing.batch_parsing import parse_corpus
+from resources import warm_up
+from scoring import RULES_COMBINATIONS
 import json
 from datetime import datetime
 import git
@@ -19,9 +24,7 @@ def get_git_info():
     return sha, message
 
 
-def load_scripts(args):
-    config = configue.load(args.parameters_path)
-
+def select_dataset(args, config):
     dataset = pd.read_csv(
         os.path.join(config["paths"]["input_folder_name"], config["names"]["db_name"])
     )
@@ -38,14 +41,38 @@ def load_scripts(args):
             .isin(args.script_filenames)
         ].reset_index(drop=True)
 
+    return dataset, nb_movies
+
+
+def remove_parsing_errors(parsed_scripts):
+    """Returns the scripts which could be parsed, printing the error of the others."""
+    parsed_without_error = []
+    for parsed_script in parsed_scripts:
+        if parsed_script.error is not None:
+            print(f"Could not parse {parsed_script.path}: {parsed_script.error}")
+        else:
+            parsed_without_error.append(parsed_script)
+    return parsed_without_error
+
+
+def load_scripts(args):
+    config = configue.load(args.parameters_path)
+
+    dataset, nb_movies = select_dataset(args, config)
+
+    parsed_scripts = remove_parsing_errors(
+        parse_corpus(list(dataset["path"])[:nb_movies], config, workers=args.workers)
+    )
+
     bechdel_computed_scores = []
     bechdel_true_scores = []
     bechdel_approved_predictions = []
     bechdel_approved_truths = []
-    for path in tqdm(list(dataset["path"])[:nb_movies]):
+    for parsed_script in tqdm(parsed_scripts):
+        path = parsed_script.path
         ground_truth = dataset[dataset["path"] == path].iloc[0]["rating"]
         script = Script.from_path(path, config, ground_truth=ground_truth)
-        script.load_format()
+        script.load_format(parsed_script)
         script.bechdel()
         score = int(script.computed_score)
         bechdel_computed_scores.append(score)
@@ -53,12 +80,10 @@ def load_scripts(args):
         bechdel_approved_predictions.append(score == 3)
         bechdel_approved_truths.append(ground_truth == 3)
 
-    bechdel_approved_predictions_df = pd.Series(bechdel_approved_predictions)
-    bechdel_approved_predictions_df.name = "prediction_bechdel_approved"
-    bechdel_computed_scores_df = pd.Series(bechdel_computed_scores)
-    bechdel_computed_scores_df.name = "predicted_rating"
-    dataset_with_predictions = pd.concat(
-        [dataset, bechdel_approved_predictions_df, bechdel_computed_scores_df], axis=1
+    dataset_with_predictions = add_predictions(
+        dataset,
+        [parsed_script.path for parsed_script in parsed_scripts],
+        bechdel_computed_scores,
     )
 
     return (
@@ -71,6 +96,54 @@ def load_scripts(args):
     )
 
 
+def load_scripts_all_rules(args):
+    """Computes the scores of the scripts for all the allowed combinations of
+    bechdel_test_rules, identifying the genders of their characters only once."""
+    config = configue.load(args.parameters_path)
+
+    dataset, nb_movies = select_dataset(args, config)
+
+    parsed_scripts = remove_parsing_errors(
+        parse_corpus(list(dataset["path"])[:nb_movies], config, workers=args.workers)
+    )
+
+    number_of_lines_in_a_row = config["bechdel_test_rules"][
+        "lines_of_dialogues_in_a_row"
+    ]
+    bechdel_computed_scores = {rules: [] for rules in RULES_COMBINATIONS}
+    bechdel_true_scores = []
+    for parsed_script in tqdm(parsed_scripts):
+        path = parsed_script.path
+        ground_truth = dataset[dataset["path"] == path].iloc[0]["rating"]
+        script = Script.from_path(path, config, ground_truth=ground_truth)
+        script.load_format(parsed_script)
+        results = script.bechdel_all_rules([number_of_lines_in_a_row])
+        for rules in RULES_COMBINATIONS:
+            bechdel_computed_scores[rules].append(
+                int(results[(*rules, number_of_lines_in_a_row)].score)
+            )
+        bechdel_true_scores.append(ground_truth)
+
+    paths = [parsed_script.path for parsed_script in parsed_scripts]
+    return bechdel_computed_scores, bechdel_true_scores, dataset, paths, config
+
+
+def add_predictions(dataset, paths, bechdel_computed_scores):
+    # the scripts which weren't scored (not parsed, or beyond nb_movies) have no
+    # prediction
+    computed_scores = dict(zip(paths, bechdel_computed_scores))
+    bechdel_computed_scores_df = dataset["path"].map(computed_scores)
+    bechdel_computed_scores_df.name = "predicted_rating"
+    bechdel_approved_predictions_df = (bechdel_computed_scores_df == 3).where(
+        bechdel_computed_scores_df.notna()
+    )
+    bechdel_approved_predictions_df.name = "prediction_bechdel_approved"
+    dataset_with_predictions = pd.concat(
+        [dataset, bechdel_approved_predictions_df, bechdel_computed_scores_df], axis=1
+    )
+    return dataset_with_predictions
+
+
 def compute_confusion_matrix(
     bechdel_truths, bechdel_approved_predictions, average, binary=False
 ):
@@ -279,10 +352,13 @@ def create_results_folder(
     nb_of_scripts,
     dataset_with_predictions,
     config,
+    folder_suffix="",
 ):
     date = format_date(datetime.now())
 
-    path_new_directory = os.path.join(config["paths"]["output_folder_name"], date)
+    path_new_directory = os.path.join(
+        config["paths"]["output_folder_name"], date + folder_suffix
+    )
     os.mkdir(path_new_directory)
     path_json = os.path.join(path_new_directory, "results.json")
     path_dataset = os.path.join(path_new_directory, "dataset_preds.csv")
@@ -323,6 +399,54 @@ def main(args):
         config,
     ) = load_scripts(args)
 
+    save_performance(
+        bechdel_predicted_scores,
+        bechdel_true_scores,
+        bechdel_predictions,
+        bechdel_truths,
+        dataset_with_predictions,
+        config,
+    )
+
+
+def main_all_rules(args):
+    (
+        bechdel_computed_scores,
+        bechdel_true_scores,
+        dataset,
+        paths,
+        config,
+    ) = load_scripts_all_rules(args)
+
+    for only_women, whole_discussion in RULES_COMBINATIONS:
+        rules_config = copy.deepcopy(config)
+        rules_config["bechdel_test_rules"]["only_women_in_whole_scene"] = only_women
+        rules_config["bechdel_test_rules"][
+            "whole_discussion_not_about_men"
+        ] = whole_discussion
+        bechdel_predicted_scores = bechdel_computed_scores[
+            (only_women, whole_discussion)
+        ]
+        save_performance(
+            bechdel_predicted_scores,
+            bechdel_true_scores,
+            [score == 3 for score in bechdel_predicted_scores],
+            [ground_truth == 3 for ground_truth in bechdel_true_scores],
+            add_predictions(dataset, paths, bechdel_predicted_scores),
+            rules_config,
+            folder_suffix=f"_{str(only_women).lower()}_{str(whole_discussion).lower()}",
+        )
+
+
+def save_performance(
+    bechdel_predicted_scores,
+    bechdel_true_scores,
+    bechdel_predictions,
+    bechdel_truths,
+    dataset_with_predictions,
+    config,
+    folder_suffix="",
+):
     nb_of_scripts = len(bechdel_truths)
 
     (
@@ -351,21 +475,122 @@ def main(args):
         nb_of_scripts,
         dataset_with_predictions,
         config,
+        folder_suffix,
     )
 
 
+def compare_gender_methods(args):
+    """Computes the scores of the scripts with each of the gender methods of
+    args.gender_methods, and saves the accuracy of the scores and the time spent per
+    script by each method in the output folder."""
+    unknown_methods = set(args.gender_methods) - set(GENDER_METHODS)
+    if unknown_methods:
+        raise ValueError(
+            f"Unknown gender methods {sorted(unknown_methods)}, "
+            f"the gender methods are {list(GENDER_METHODS)}"
+        )
+    config = configue.load(args.parameters_path)
+    dataset, nb_movies = select_dataset(args, config)
+    # the scripts are only parsed once for all the methods
+    parsed_scripts = remove_parsing_errors(
+        parse_corpus(list(dataset["path"])[:nb_movies], config, workers=args.workers)
+    )
+    ground_truths = dict(zip(dataset["path"], dataset["rating"]))
+
+    comparison = []
+    for method in args.gender_methods:
+        method_config = copy.deepcopy(config)
+        method_config["used_methods"]["character_gender_method"] = method
+        # the coreferences computed before would hide the time spent by coref
+        method_config["coref_cache"]["enabled"] = False
+        # the models are loaded beforehand, so that only the scripts are timed
+        warm_up(method_config)
+
+        predicted_scores, true_scores, durations = [], [], []
+        for parsed_script in tqdm(parsed_scripts, desc=method):
+            ground_truth = ground_truths[parsed_script.path]
+            script = Script.from_path(
+                parsed_script.path, method_config, ground_truth=ground_truth
+            )
+            script.load_format(parsed_script)
+            start = time.perf_counter()
+            script.bechdel()
+            durations.append(time.perf_counter() - start)
+            predicted_scores.append(int(script.computed_score))
+            true_scores.append(ground_truth)
+
+        nb_of_scripts = len(true_scores)
+        # the accuracies and the mean time are left empty if no script could be parsed
+        mean = lambda values: (
+            round(sum(values) / nb_of_scripts, 4) if nb_of_scripts else None
+        )
+        comparison.append(
+            {
+                "character_gender_method": method,
+                "number_of_scripts": nb_of_scripts,
+                "score_accuracy": mean(
+                    [
+                        predicted == true
+                        for predicted, true in zip(predicted_scores, true_scores)
+                    ]
+                ),
+                "binary_accuracy": mean(
+                    [
+                        (predicted == 3) == (true == 3)
+                        for predicted, true in zip(predicted_scores, true_scores)
+                    ]
+                ),
+                "mean_seconds_per_script": mean(durations),
+                "total_seconds": round(sum(durations), 2),
+            }
+        )
+
+    comparison = pd.DataFrame(comparison)
+    print(comparison.to_string(index=False))
+    path_csv = os.path.join(
+        config["paths"]["output_folder_name"],
+        f"gender_methods_{format_date(datetime.now())}.csv",
+    )
+    comparison.to_csv(path_csv, index=False)
+
+
 def get_list_script_filenames(string):
     return string.split(",")
 
 
+def get_list_gender_methods(string):
+    gender_methods = string.split(",")
+    for method in gender_methods:
+        if method not in GENDER_METHODS:
+            raise argparse.ArgumentTypeError(
+                f"unknown gender method {method!r}, "
+                f"the gender methods are {', '.join(GENDER_METHODS)}"
+            )
+    return gender_methods
+
+
 parser = argparse.ArgumentParser()
 parser.add_argument("--parameters_path", type=str, default="parameters.yaml")
 parser.add_argument("--nb_movies", type=int, default=None)
 parser.add_argument("--random", type=bool, default=False)
 # str of the form "script1.txt,script2.txt,script3.txt" (script filenames separated by commas)
 parser.add_argument("--script_filenames", type=get_list_script_filenames, default=None)
+# number of processes parsing the scripts, defaults to the number of cores (at most 2
+# when reparse_with_ml is true, since each process loads the parsing model)
+parser.add_argument("--workers", type=int, default=None)
+# str of the form "proximity,narrative,coref", compares the gender methods instead of
+# saving the performance of the config
+parser.add_argument("--gender_methods", type=get_list_gender_methods, default=None)
+# saves the performance of each allowed combination of bechdel_test_rules, in folders
+# suffixed by the values of only_women_in_whole_scene and whole_discussion_not_about_men
+parser.add_argument("--all_rules", action="store_true")
 parser.set_defaults(predict=True)
 
 if __name__ == "__main__":
     args = parser.parse_args()
-    main(args)
+    if args.gender_methods is not None:
+        compare_gender_methods(args)
+    elif args.all_rules:
+        main_all_rules(args)
+    else:
+        main(args)
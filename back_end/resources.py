@@ -0,0 +1,188 @@
+"""Registry of the heavy resources used to compute the Bechdel score of a script
+(name to gender index, gender classifier, spaCy pipeline, parsing model, word lists...).
+Each resource is loaded the first time it is needed, then shared by all the scripts
+handled by the process, including from several threads.
+Use warm_up to load them beforehand, for example when starting the API."""
+
+import os
+import threading
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+import pandas as pd
+
+from gender.gender_name import load_classifier, load_name_index
+from gender.narrative_approach import import_gender_tokens
+from topic_modeling.utils import import_masculine_words
+
+
+class ResourceRegistry:
+    """Loads resources lazily and only once, even when requested from several
+    threads at the same time. A resource is loaded from the config, and loaded
+    again for a config whose key (for example the path of the resource) differs."""
+
+    def __init__(self):
+        self._loaders: Dict[str, Tuple[Callable[[dict], object], Callable]] = {}
+        self._resources: Dict[Tuple[str, Hashable], object] = {}
+        self._locks: Dict[Tuple[str, Hashable], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[dict], object],
+        key: Callable[[dict], Hashable] = lambda config: None,
+    ):
+        """Registers how to load a resource.
+
+        Args:
+            name (str): name of the resource
+            loader (Callable[[dict], object]): function loading the resource from
+                the config
+            key (Callable[[dict], Hashable], optional): function returning the
+                parts of the config the resource depends on. Defaults to a
+                resource independent from the config.
+        """
+        self._loaders[name] = (loader, key)
+
+    def get(self, name: str, config: dict) -> object:
+        loader, key_function = self._loaders[name]
+        key = (name, key_function(config))
+        if key in self._resources:
+            return self._resources[key]
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        # only one thread loads the resource, the others wait for it
+        with lock:
+            if key not in self._resources:
+                self._resources[key] = loader(config)
+        return self._resources[key]
+
+    def clear(self):
+        with self._lock:
+            self._resources.clear()
+            self._locks.clear()
+
+
+registry = ResourceRegistry()
+
+
+def _name_index_paths(config: dict) -> Tuple[str, str]:
+    # the index is built from the database, then saved to its own file
+    return (
+        os.path.join(
+            config["paths"]["input_folder_name"], config["names"]["list_prenoms"]
+        ),
+        os.path.join(
+            config["paths"]["input_folder_name"], config["names"]["name_index"]
+        ),
+    )
+
+
+def _classifier_path(config: dict) -> str:
+    return os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["name_classifier"]
+    )
+
+
+# spacy, neuralcoref and torch are only imported when their model is needed, the
+# parsing model module also uses this registry
+def _load_coref_pipeline(config: dict):
+    import neuralcoref
+    import spacy
+
+    nlp = spacy.load("en")
+    neuralcoref.add_to_pipe(nlp)
+    return nlp
+
+
+def _load_parsing_model(config: dict):
+    from script_parsing.ml_parsing import get_trained_model
+
+    return get_trained_model(config)
+
+
+def _load_masculine_words(config: dict) -> Tuple[str]:
+    # a tuple, since it is shared by all the scripts
+    return tuple(import_masculine_words(config))
+
+
+registry.register("name_index", load_name_index, _name_index_paths)
+registry.register("classifier", load_classifier, _classifier_path)
+registry.register("coref_pipeline", _load_coref_pipeline)
+registry.register(
+    "parsing_model",
+    _load_parsing_model,
+    lambda config: (
+        os.path.join(
+            config["paths"]["input_folder_name"], config["names"]["parsing_model"]
+        ),
+        repr(config["script_parsing_model"]["model_architecture"]),
+    ),
+)
+registry.register(
+    "gender_tokens",
+    import_gender_tokens,
+    lambda config: (
+        config["paths"]["pronoun_folder"],
+        config["names"]["list_pronoun_tokens"],
+    ),
+)
+registry.register(
+    "masculine_words",
+    _load_masculine_words,
+    lambda config: (
+        config["paths"]["topic_modeling_folder"],
+        config["names"]["list_of_words_about_men"],
+    ),
+)
+
+
+def get_name_index(config: dict) -> Dict[str, str]:
+    return registry.get("name_index", config)
+
+
+def get_classifier(config: dict):
+    return registry.get("classifier", config)
+
+
+def get_coref_pipeline(config: dict):
+    return registry.get("coref_pipeline", config)
+
+
+def get_parsing_model(config: dict):
+    return registry.get("parsing_model", config)
+
+
+def get_gender_tokens(config: dict) -> pd.DataFrame:
+    return registry.get("gender_tokens", config)
+
+
+def get_masculine_words(config: dict) -> Tuple[str]:
+    return registry.get("masculine_words", config)
+
+
+def get_used_resources(config: dict) -> List[str]:
+    """Returns the names of the resources needed with the methods of the config."""
+    resources = ["name_index", "gender_tokens", "masculine_words"]
+    character_gender_method = config["used_methods"]["character_gender_method"]
+    if character_gender_method == "classify":
+        resources.append("classifier")
+    elif character_gender_method == "coref":
+        resources.append("coref_pipeline")
+    if config["used_methods"]["reparse_with_ml"]:
+        resources.append("parsing_model")
+    return resources
+
+
+def warm_up(config: dict, resources: Iterable[str] = None):
+    """Loads resources in advance, so that the first script doesn't wait for them.
+
+    Args:
+        config (dict): config yaml file imported as a dict
+        resources (Iterable[str], optional): names of the resources to load.
+            Defaults to the resources needed with the methods of the config.
+    """
+    if resources is None:
+        resources = get_used_resources(config)
+    for name in resources:
+        registry.get(name, config)
@@ -0,0 +1,147 @@
+"""Computation of the Bechdel score of a script from arrays describing its dialogues.
+The scores of all the rules of the test (see bechdel_test_rules in the parameters
+file) are computed at once, without going through the dialogues again for each rule."""
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+# the allowed values of (only_women_in_whole_scene, whole_discussion_not_about_men)
+RULES_COMBINATIONS = ((True, True), (True, False), (False, False))
+
+
+class DialoguesArrays(NamedTuple):
+    """Dialogues of a script, in the order of the scenes, and characters of its scenes."""
+
+    # scene of each dialogue
+    scene_ids: np.ndarray
+    # speaker of each dialogue, speakers with the same name having the same id
+    speaker_ids: np.ndarray
+    # whether the speaker of each dialogue is a woman
+    is_woman: np.ndarray
+    # whether each dialogue contains a word about men
+    about_men: np.ndarray
+    # number of characters and of women among the characters of each scene
+    scenes_nb_characters: np.ndarray
+    scenes_nb_women: np.ndarray
+    # number of named women in the script
+    nb_named_women: int
+
+
+class BechdelResult(NamedTuple):
+    score: int
+    score2_scenes: List[int]
+    score3_scenes: List[int]
+
+
+def _max_count_in_runs(
+    condition: np.ndarray,
+    increments: np.ndarray,
+    scene_ids: np.ndarray,
+    nb_scenes: int,
+) -> np.ndarray:
+    """Splits the dialogues of each scene into runs of successive dialogues meeting the
+    condition, counts the increments over each run, and returns the highest count of
+    each scene (0 if it has no run)."""
+    max_counts = np.zeros(nb_scenes, dtype=np.int64)
+    if not condition.any():
+        return max_counts
+    previous_condition = np.concatenate(([False], condition[:-1]))
+    new_scene = np.concatenate(([True], scene_ids[1:] != scene_ids[:-1]))
+    run_starts = condition & (~previous_condition | new_scene)
+    run_ids = np.cumsum(run_starts) - 1
+    cumulated = np.cumsum(np.where(condition, increments, 0))
+    # count of each run before its first dialogue
+    before_runs = (cumulated - increments)[run_starts]
+    counts = cumulated[condition] - before_runs[run_ids[condition]]
+    np.maximum.at(max_counts, scene_ids[condition], counts)
+    return max_counts
+
+
+def compute_bechdel_scores(
+    arrays: DialoguesArrays,
+    numbers_of_lines_in_a_row: Iterable[int],
+    rules_combinations: Iterable[Tuple[bool, bool]] = RULES_COMBINATIONS,
+) -> Dict[Tuple[bool, bool, int], BechdelResult]:
+    """Computes the Bechdel score of a script and the scenes validating the tests 2 and
+    3, for each combination of rules and each number of lines of dialogues in a row.
+
+    Args:
+        arrays (DialoguesArrays): dialogues and characters of the script
+        numbers_of_lines_in_a_row (Iterable[int]): values of lines_of_dialogues_in_a_row
+        rules_combinations (Iterable[Tuple[bool, bool]], optional): values of
+            (only_women_in_whole_scene, whole_discussion_not_about_men). Defaults to
+            all the allowed ones.
+
+    Returns:
+        Dict[Tuple[bool, bool, int], BechdelResult]: the score and the validating
+            scenes for each (only_women_in_whole_scene, whole_discussion_not_about_men,
+            lines_of_dialogues_in_a_row).
+    """
+    numbers_of_lines_in_a_row = list(numbers_of_lines_in_a_row)
+    rules_combinations = list(rules_combinations)
+    if arrays.nb_named_women < 2:
+        return {
+            (only_women, whole_discussion, n): BechdelResult(0, [], [])
+            for only_women, whole_discussion in rules_combinations
+            for n in numbers_of_lines_in_a_row
+        }
+
+    scene_ids, speaker_ids, is_woman, about_men = (
+        arrays.scene_ids,
+        arrays.speaker_ids,
+        arrays.is_woman,
+        arrays.about_men,
+    )
+    nb_scenes = len(arrays.scenes_nb_characters)
+    has_dialogues = np.bincount(scene_ids, minlength=nb_scenes) > 0
+    several_characters = arrays.scenes_nb_characters > 1
+    # whether each dialogue is said by someone else than the previous one of its scene
+    new_speaker = np.ones(len(scene_ids), dtype=bool)
+    new_speaker[1:] = (speaker_ids[1:] != speaker_ids[:-1]) | (
+        scene_ids[1:] != scene_ids[:-1]
+    )
+
+    # test 2 : only women in the scene, or women talking one after the other
+    only_women_scenes = several_characters & (
+        arrays.scenes_nb_women == arrays.scenes_nb_characters
+    )
+    women_dialogues_in_a_row = _max_count_in_runs(
+        is_woman & new_speaker,
+        np.ones(len(scene_ids), dtype=np.int64),
+        scene_ids,
+        nb_scenes,
+    )
+    two_women_scenes = (
+        several_characters & (arrays.scenes_nb_women >= 2) & has_dialogues
+    )
+
+    # test 3 : no dialogue about men in the scene, or women talking one after the
+    # other without talking about men, the same woman talking again not being counted
+    scenes_about_men = np.zeros(nb_scenes, dtype=bool)
+    scenes_about_men[scene_ids[about_men]] = True
+    not_about_men_scenes = has_dialogues & ~scenes_about_men
+    women_not_about_men_in_a_row = _max_count_in_runs(
+        is_woman & ~about_men, new_speaker.astype(np.int64), scene_ids, nb_scenes
+    )
+
+    results = {}
+    for only_women, whole_discussion in rules_combinations:
+        for n in numbers_of_lines_in_a_row:
+            if only_women:
+                score2_scenes = only_women_scenes
+            else:
+                score2_scenes = two_women_scenes & (women_dialogues_in_a_row >= n)
+            if whole_discussion:
+                score3_scenes = score2_scenes & not_about_men_scenes
+            else:
+                score3_scenes = (
+                    score2_scenes & has_dialogues & (women_not_about_men_in_a_row >= n)
+                )
+            score2_scenes = np.flatnonzero(score2_scenes).tolist()
+            score3_scenes = np.flatnonzero(score3_scenes).tolist()
+            score = 1 + bool(score2_scenes) + bool(score3_scenes)
+            results[(only_women, whole_discussion, n)] = BechdelResult(
+                score, score2_scenes, score3_scenes
+            )
+    return results
@@ -1,26 +1,60 @@
-from typing import List
+from typing import Dict, List, Set, Tuple, Union
 import re
 
-from script_parsing.naive_parsing import label, tag_script
-from topic_modeling.utils import import_masculine_words, clean_text
+import numpy as np
+
+from script_parsing.naive_parsing import (
+    LABEL_CODES,
+    LabelsView,
+    encode_tags,
+    label,
+    tag_script,
+)
+from topic_modeling.utils import MasculineLexicon, TokenizedDialogues, clean_text
+from topic_modeling.multi_pattern import MultiPatternMatcher
 from script_parsing.ml_parsing import tag_script_with_ml
-from gender.gender_name import load_classifier, _classify, load_database
-from gender.narrative_approach import import_gender_tokens, naive_narrative_gender
-from gender.neural_coref import list_pronouns_coref
+from script_parsing.batch_parsing import ParsedScript
+from script_parsing.parse_cache import load_cached_parsing, save_parsing
+from scoring import BechdelResult, DialoguesArrays, compute_bechdel_scores
+from gender.gender_name import classify_many
+from gender.narrative_approach import GenderTokens, naive_narrative_genders
+from gender.proximity_approach import proximity_genders
+from gender.neural_coref import (
+    list_pronouns_coref,
+    load_cached_coref,
+    save_coref,
+    select_paragraphs,
+)
 import nltk
-import spacy
-import neuralcoref
+from resources import (
+    get_classifier,
+    get_coref_pipeline,
+    get_gender_tokens,
+    get_masculine_words,
+    get_name_index,
+)
+
+EMPTY_LINE = LABEL_CODES[label.EMPTY_LINE]
+SCENES_BOUNDARY = LABEL_CODES[label.SCENES_BOUNDARY]
+SCENES_DESCRIPTION = LABEL_CODES[label.SCENES_DESCRIPTION]
+CHARACTER = LABEL_CODES[label.CHARACTER]
+DIALOGUE = LABEL_CODES[label.DIALOGUE]
+METADATA = LABEL_CODES[label.METADATA]
+
+# the values of config["used_methods"]["character_gender_method"]
+GENDER_METHODS = ("classify", "narrative", "proximity", "coref")
 
 
 class Script:
     def __init__(
         self, script_text: str, config: dict, ground_truth=None, user_genders=None
     ):
-        self.script_text = script_text
+        self.script_buffer = ScriptBuffer(script_text)
         self.config = config
         self.user_genders = user_genders
         self.list_scenes: List[Scene] = []
-        self.list_list_tags: List[List[label]] = []
+        # label codes of all the lines of the script, each scene has a view on its part
+        self.tags: np.ndarray = np.zeros(0, dtype=np.uint8)
         self.coherent_parsing: bool = None
         self.list_characters: List[Character] = []
         self.list_list_dialogues: List[List[Dialogue]] = []
@@ -31,6 +65,19 @@ class Script:
         self.score2_scenes: List[int] = []
         self.score3_scenes: List[int] = []
         self.bechdel_rules = self.config["bechdel_test_rules"]
+        self.tokenized_dialogues: TokenizedDialogues = None
+        self.masculine_lexicon: MasculineLexicon = None
+        # what doesn't depend on the genders of the characters is kept, so that the
+        # script is scored again quickly when the user changes some genders
+        self.characters_named: bool = False
+        self.masculine_lexicon_key: tuple = None
+        # index in list_characters of the speaker of each dialogue and of the
+        # characters of each scene, along with the scene of these characters
+        self.dialogues_characters: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.dialogues_scene_ids: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.dialogues_speaker_ids: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.scenes_characters: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.scenes_characters_scene_ids: np.ndarray = np.zeros(0, dtype=np.int32)
 
     @classmethod
     def from_path(
@@ -40,11 +87,22 @@ class Script:
             script_text = f.read()
         return cls(script_text, config, ground_truth, user_genders)
 
-    def load_format(self):
-        self.load_scenes()
-        self.identify_characters()
-        self.check_parsing_is_coherent()
-        self.reparse_if_incoherent()
+    @property
+    def script_text(self) -> str:
+        return self.script_buffer.text
+
+    @property
+    def list_list_tags(self) -> List[LabelsView]:
+        return [scene.list_tags for scene in self.list_scenes]
+
+    def load_format(self, parsed_script: ParsedScript = None):
+        if parsed_script is None:
+            self.load_scenes()
+            self.identify_characters()
+            self.check_parsing_is_coherent()
+            self.reparse_if_incoherent()
+        else:
+            self.apply_parsing(parsed_script)
         self.load_dialogues()
         self.load_narration()
 
@@ -53,90 +111,265 @@ class Script:
         self.user_genders = user_genders
         self.score2_scenes = []
         self.score3_scenes = []
-        self.are_characters_named()
+        self.load_genders()
+        rules = (
+            self.bechdel_rules["only_women_in_whole_scene"],
+            self.bechdel_rules["whole_discussion_not_about_men"],
+            self.bechdel_rules["lines_of_dialogues_in_a_row"],
+        )
+        result = compute_bechdel_scores(
+            self.get_dialogues_arrays(), [rules[2]], [rules[:2]]
+        )[rules]
+        self.computed_score, self.score2_scenes, self.score3_scenes = result
+        self.load_scenes_details()
+
+    def bechdel_all_rules(
+        self, numbers_of_lines_in_a_row: List[int], user_genders=None
+    ) -> Dict[tuple, BechdelResult]:
+        """Computes the score of the script for all the allowed combinations of
+        bechdel_test_rules, the genders of the characters being only identified once.
+
+        Args:
+            numbers_of_lines_in_a_row (List[int]): values of lines_of_dialogues_in_a_row
+            user_genders (dict, optional): genders given by the user. Defaults to None.
+
+        Returns:
+            Dict[tuple, BechdelResult]: the score and the validating scenes for each
+                (only_women_in_whole_scene, whole_discussion_not_about_men,
+                lines_of_dialogues_in_a_row).
+        """
+        self.user_genders = user_genders
+        self.load_genders()
+        return compute_bechdel_scores(
+            self.get_dialogues_arrays(), numbers_of_lines_in_a_row
+        )
+
+    def load_genders(self):
+        # whether the characters are named doesn't depend on their genders
+        if not self.characters_named:
+            self.are_characters_named()
         self.identify_gender_named_chars()
         self.load_named_males()
-        self.load_score_1()
-        self.load_score_2()
-        self.load_score_3()
+        # the lexicon is only built again if the male characters changed, so that
+        # the words about men found in the dialogues are kept otherwise
+        masculine_words = get_masculine_words(self.config)
+        masculine_lexicon_key = (masculine_words, tuple(self.male_named_characters))
+        if masculine_lexicon_key != self.masculine_lexicon_key:
+            self.masculine_lexicon = MasculineLexicon(
+                masculine_words, self.male_named_characters
+            )
+            self.masculine_lexicon_key = masculine_lexicon_key
 
     def load_scenes(self, with_ml: bool = False):
+        cached_parsing = load_cached_parsing(self.script_text, self.config, with_ml)
+        if cached_parsing is not None:
+            self.load_parsing(*cached_parsing)
+            return
         if not with_ml:
-            list_scenes, self.list_list_tags = tag_script(self.script_text)
+            list_scenes, list_list_tags = tag_script(self.script_text)
         else:
-            list_scenes, self.list_list_tags = tag_script_with_ml(
+            list_scenes, list_list_tags = tag_script_with_ml(
                 self.config, self.script_text
             )
+        # the scenes only keep the position of their lines in the script buffer,
+        # the lines returned by the parsing are not kept
+        scenes_sizes = [len(scene) for scene in list_scenes]
+        tags = encode_tags(tag for tags in list_list_tags for tag in tags)
+        save_parsing(self.script_text, self.config, scenes_sizes, tags, with_ml)
+        self.load_parsing(scenes_sizes, tags)
+
+    def load_parsing(self, scenes_sizes: List[int], tags: np.ndarray):
+        """Builds the scenes from an already computed parsing of the script.
+
+        Args:
+            scenes_sizes (List[int]): number of lines of each scene
+            tags (np.ndarray): label codes of all the lines of the script
+        """
+        self.tags = tags
         self.list_scenes = []
-        for i, scene in enumerate(list_scenes):
-            self.list_scenes.append(Scene(scene, self.list_list_tags[i]))
+        first_line = 0
+        for scene_size in scenes_sizes:
+            last_line = first_line + int(scene_size)
+            self.list_scenes.append(
+                Scene(self.script_buffer, first_line, self.tags[first_line:last_line])
+            )
+            first_line = last_line
+
+    def apply_parsing(self, parsed_script: ParsedScript):
+        """Loads the scenes and the characters of the script from its parsing
+        computed by script_parsing.batch_parsing, without parsing it again.
+
+        Args:
+            parsed_script (ParsedScript): parsing of the script
+        """
+        if parsed_script.error is not None:
+            raise ValueError(
+                f"Parsing of {parsed_script.path} failed: {parsed_script.error}"
+            )
+        self.load_parsing(parsed_script.scenes_sizes, parsed_script.tags)
+        self.identify_characters()
+        self.coherent_parsing = parsed_script.coherent_parsing
 
     def identify_characters(self):
         self.list_characters = []
-        for i, scene in enumerate(self.list_scenes):
-            for j, lab in enumerate(self.list_list_tags[i]):
-                if lab == label.CHARACTER:
-                    name = scene.list_lines[j].lstrip()
-                    already_in = False
-                    char_if_already_in = None
-                    for name_og in self.list_characters:
-                        if name_og.name.startswith(name) or name.startswith(
-                            name_og.name
-                        ):
-                            name_og.add_name_variation(name)
-                            already_in = True
-                            char_if_already_in = name_og
-                            break
-                    if already_in == False:
-                        new_character = Character(scene.list_lines[j].lstrip())
-                        self.list_characters.append(new_character)
-                        scene.list_characters_in_scene.append(new_character)
-                    else:
-                        if char_if_already_in not in scene.list_characters_in_scene:
-                            scene.list_characters_in_scene.append(char_if_already_in)
+        characters_index = CharacterIndex()
+        for scene in self.list_scenes:
+            for j in np.flatnonzero(scene.tags == CHARACTER):
+                name = scene.line(j).lstrip()
+                # the first character whose name begins with this name or is the
+                # beginning of this name
+                char_if_already_in = characters_index.find(name)
+                if char_if_already_in is None:
+                    new_character = Character(name)
+                    self.list_characters.append(new_character)
+                    characters_index.add(new_character)
+                    scene.list_characters_in_scene.append(new_character)
+                else:
+                    char_if_already_in.add_name_variation(name)
+                    if char_if_already_in not in scene.list_characters_in_scene:
+                        scene.list_characters_in_scene.append(char_if_already_in)
 
     def load_dialogues(self):
+        # in theory, each name variation should correspond to only one character,
+        # else the first one is kept
+        characters_by_name = {}
+        for character in self.list_characters:
+            for name_variation in character.name_variation:
+                characters_by_name.setdefault(name_variation, character)
         for scene in self.list_scenes:
-            scene.load_dialogues(self.list_characters)
+            scene.load_dialogues(characters_by_name)
             self.list_list_dialogues.append(scene.list_dialogues)
+        # the dialogues are tokenized once for all the searches of words about men,
+        # their lines being read from the script buffer one dialogue at a time, so
+        # that only the token ids are kept
+        dialogues = [
+            dialogue for scene in self.list_scenes for dialogue in scene.list_dialogues
+        ]
+        line = self.script_buffer.line
+        self.tokenized_dialogues = TokenizedDialogues(
+            [line(dialogue.scene.first_line + i).lstrip() for i in dialogue.indexes]
+            for dialogue in dialogues
+        )
+        for i, dialogue in enumerate(dialogues):
+            dialogue.tokens = self.tokenized_dialogues
+            dialogue.tokens_index = i
+        self.characters_named = False
+        self.load_dialogues_structure(dialogues)
+
+    def load_dialogues_structure(self, dialogues: List["Dialogue"]):
+        """Describes who speaks in each dialogue and who is in each scene with arrays,
+        which don't depend on the genders of the characters."""
+        characters_indexes = {
+            id(character): i for i, character in enumerate(self.list_characters)
+        }
+        self.dialogues_characters = np.array(
+            [characters_indexes[id(dialogue.character)] for dialogue in dialogues],
+            dtype=np.int32,
+        )
+        self.dialogues_scene_ids = np.repeat(
+            np.arange(len(self.list_scenes), dtype=np.int32),
+            [len(scene.list_dialogues) for scene in self.list_scenes],
+        )
+        # speakers with the same name have the same id
+        speakers_ids = {}
+        self.dialogues_speaker_ids = np.array(
+            [
+                speakers_ids.setdefault(dialogue.character.name, len(speakers_ids))
+                for dialogue in dialogues
+            ],
+            dtype=np.int32,
+        )
+        self.scenes_characters = np.array(
+            [
+                characters_indexes[id(character)]
+                for scene in self.list_scenes
+                for character in scene.list_characters_in_scene
+            ],
+            dtype=np.int32,
+        )
+        self.scenes_characters_scene_ids = np.repeat(
+            np.arange(len(self.list_scenes), dtype=np.int32),
+            [len(scene.list_characters_in_scene) for scene in self.list_scenes],
+        )
 
     def load_narration(self):
-        narration = []
         for scene in self.list_scenes:
             scene.load_narration()
-            narration += scene.list_narration
-        self.list_narration = All_Narration(narration, self.config)
+        self.list_narration = All_Narration(self.list_scenes, self.config)
 
     def are_characters_named(self):
+        # transform dialogues of all movie in one string
+        concatenated_dialogues = " ".join(
+            [
+                " ".join([dialogue.speech_text for dialogue in scene])
+                for scene in self.list_list_dialogues
+            ]
+        )
+        # all the names are searched at once in the dialogues
+        names_matcher = MultiPatternMatcher(
+            name_variation.capitalize()
+            for character in self.list_characters
+            for name_variation in character.name_variation
+        )
+        names_in_dialogues = names_matcher.find_all(concatenated_dialogues)
         for character in self.list_characters:
-            character.fill_is_named(self.list_list_dialogues)
+            character.fill_is_named(names_in_dialogues)
+        self.characters_named = True
 
     def identify_gender_named_chars(self):
         para = self.config["used_methods"]["character_gender_method"]
-        gender_data = load_database(self.config)
-        if para == "classify":
-            classifier = load_classifier(self.config)
-            function = lambda x: _classify(x, classifier)[0]
-        elif para == "narrative":
-            function = lambda x: self.list_narration.character_narrative_gender(x)
-        elif para == "coref":
-            nlp = spacy.load("en")
-            neuralcoref.add_to_pipe(nlp)
-            pronouns = list_pronouns_coref(self.list_narration.list_contents, nlp)
-            function = lambda x: self.list_narration.character_coref_gender(x, pronouns)
+        name_index = get_name_index(self.config)
+        # the gender method is only used for the characters whose gender is neither
+        # given by the user nor found in the name database
+        unresolved_characters = []
         for character in self.list_characters:
             if character.is_named:
                 if self.user_genders and (character.name in self.user_genders.keys()):
                     character.gender = self.user_genders[character.name]
                 else:
-                    if character.name.lower().split()[0] in gender_data["name"].values:
-                        temp = gender_data.loc[
-                            gender_data["name"] == character.name.lower().split()[0]
-                        ]["gender"].values[0]
+                    temp = name_index.get(character.name.lower().split()[0])
+                    if temp is not None:
                         if temp != "f,m" and temp != "m,f":
                             character.gender = temp
                     if not character.gender:
-                        character.identify_gender(function)
+                        unresolved_characters.append(character)
+        if not unresolved_characters:
+            return
+
+        names = [character.name for character in unresolved_characters]
+        if para == "classify":
+            classifier = get_classifier(self.config)
+            guesses = dict(zip(names, classify_many(names, classifier)))
+            function = lambda x: guesses[x][0]
+        elif para == "narrative":
+            guesses = self.list_narration.characters_narrative_gender(names)
+            function = lambda x: guesses[x]
+        elif para == "proximity":
+            guesses = self.list_narration.characters_proximity_gender(
+                names, self.config["proximity"]["window"]
+            )
+            function = lambda x: guesses[x]
+        elif para == "coref":
+            # the coreferences of a character are only looked for in the paragraphs
+            # naming it
+            list_contents = select_paragraphs(
+                self.list_narration.list_contents,
+                names,
+                self.config["coref"]["window"],
+            )
+            pronouns = load_cached_coref(list_contents, self.config)
+            if pronouns is None:
+                pronouns = list_pronouns_coref(
+                    list_contents,
+                    get_coref_pipeline(self.config),
+                    self.config["coref"]["batch_size"],
+                    self.config["coref"]["n_process"],
+                )
+                save_coref(list_contents, self.config, pronouns)
+            guesses = self.list_narration.characters_coref_gender(names, pronouns)
+            function = lambda x: guesses[x]
+        for character in unresolved_characters:
+            character.identify_gender(function)
 
     def load_named_males(self):
         self.male_named_characters = []
@@ -147,47 +380,62 @@ class Script:
                         name.lower() for name in list(character.name_variation)
                     ]
 
-    def load_score_1(self):
-        females = [
-            character
-            for character in self.list_characters
-            if character.is_named == True and character.gender == "f"
-        ]
-        self.computed_score += len(females) >= 2
-
-    def load_score_2(self):
-        if self.computed_score == 1:
-            for index, scene in enumerate(self.list_scenes):
-                scene.is_elligible_characters_gender_method(
-                    self.bechdel_rules["only_women_in_whole_scene"],
-                    self.bechdel_rules["lines_of_dialogues_in_a_row"],
-                )
-                self.computed_score = min(
-                    self.computed_score + scene.is_elligible_characters_gender, 2
-                )
-                if scene.is_elligible_characters_gender:
-                    self.score2_scenes.append(index)
-        # return score = 2 le cas échéant et liste de scènes qui valident le test 2
-
-    def load_score_3(self):
-        masculine_words = import_masculine_words(self.config)
-        for index in self.score2_scenes:
-            scene = self.list_scenes[index]
-            scene.is_elligible_topic_method(
-                self.male_named_characters,
-                masculine_words,
-                self.bechdel_rules["whole_discussion_not_about_men"],
-                self.bechdel_rules["lines_of_dialogues_in_a_row"],
+    def get_dialogues_arrays(self) -> DialoguesArrays:
+        """Describes the dialogues of the script, in the order of the scenes, and the
+        characters of its scenes with arrays, see DialoguesArrays."""
+        are_women = np.array(
+            [character.gender == "f" for character in self.list_characters], dtype=bool
+        )
+        nb_scenes = len(self.list_scenes)
+        return DialoguesArrays(
+            scene_ids=self.dialogues_scene_ids,
+            speaker_ids=self.dialogues_speaker_ids,
+            is_woman=are_women[self.dialogues_characters],
+            about_men=self.tokenized_dialogues.about_men(self.masculine_lexicon),
+            scenes_nb_characters=np.bincount(
+                self.scenes_characters_scene_ids, minlength=nb_scenes
+            ),
+            scenes_nb_women=np.bincount(
+                self.scenes_characters_scene_ids[are_women[self.scenes_characters]],
+                minlength=nb_scenes,
+            ),
+            nb_named_women=sum(
+                character.is_named == True and character.gender == "f"
+                for character in self.list_characters
+            ),
+        )
+
+    def load_scenes_details(self):
+        """Finds the lines of the scenes validating the tests 2 and 3 to display them,
+        along with the words about men of the scenes only validating the test 2.
+        The details of a scene are only computed again if the rules, the words about men
+        found in its dialogues or the genders of its characters changed since they were
+        computed."""
+        rules = (
+            self.bechdel_rules["only_women_in_whole_scene"],
+            self.bechdel_rules["whole_discussion_not_about_men"],
+            self.bechdel_rules["lines_of_dialogues_in_a_row"],
+        )
+        score2_scenes = set(self.score2_scenes)
+        for index, scene in enumerate(self.list_scenes):
+            if index not in score2_scenes:
+                if scene.details_key is not None:
+                    scene.reset_details()
+                continue
+            details_key = (
+                rules,
+                scene.words_about_men_in_dialogues(self.masculine_lexicon),
+                tuple(character.gender for character in scene.list_characters_in_scene),
+                tuple(dialogue.character.gender for dialogue in scene.list_dialogues),
             )
-            self.computed_score = min(self.computed_score + scene.is_elligible_topic, 3)
-            if scene.is_elligible_topic:
-                self.score3_scenes.append(index)
-            else:
-                scene.load_scene_buzz_words(
-                    self.male_named_characters,
-                    masculine_words,
-                )
-        # return score = 3 le cas échéant et liste de scènes qui valident le test 3
+            if details_key == scene.details_key:
+                continue
+            scene.reset_details()
+            scene.is_elligible_characters_gender_method(rules[0], rules[2])
+            scene.is_elligible_topic_method(self.masculine_lexicon, rules[1], rules[2])
+            if not scene.is_elligible_topic:
+                scene.load_scene_buzz_words(self.masculine_lexicon)
+            scene.details_key = details_key
 
     def passes_bechdel_test(self):
         approved_scenes = self.score3_scenes
@@ -212,8 +460,7 @@ class Script:
             print(
                 f"""There is at least two women who are named : {
                     ", ".join(named_women_characters)
-                }\n"""
-            )
+                }\n""")
             if self.computed_score == 1:
                 print(
                     "However, they never talk in the same scene without other men, here are some scenes where they appear :"
@@ -239,8 +486,7 @@ class Script:
                                             for character in scene.list_characters_in_scene
                                         ]
                                     )
-                                }"""
-                            )
+                                }""")
                             current_nb_scenes += 1
                     if current_nb_scenes == 5:
                         break
@@ -259,8 +505,7 @@ class Script:
                                         for character in self.list_scenes[i].list_characters_in_scene
                                     ]
                                 )
-                            }"""
-                        )
+                            }""")
                     print("However, they talk about men in all of those scenes.")
 
                 elif self.computed_score == 3:
@@ -277,8 +522,7 @@ class Script:
                                         for character in self.list_scenes[i].list_characters_in_scene
                                     ]
                                 )
-                            }"""
-                        )
+                            }""")
                 nb_scenes_to_print = min(nb_scenes, len(relevant_scenes))
                 print(
                     f"\nHere {'are' if nb_scenes_to_print > 1 else 'is'} {nb_scenes_to_print} {'scenes' if nb_scenes_to_print > 1 else 'scene'} that validate this score :"
@@ -290,14 +534,11 @@ class Script:
                     print(self.list_scenes[scene_id])
 
     def check_parsing_is_coherent(self):
-        all_tags = sum(self.list_list_tags, [])
+        tags_counts = np.bincount(self.tags, minlength=len(LABEL_CODES))
         self.coherent_parsing = True
         if (
-            label.DIALOGUE not in all_tags
-            or label.CHARACTER not in all_tags
-            or label.SCENES_DESCRIPTION not in all_tags
-            or label.SCENES_BOUNDARY not in all_tags
-        ):
+            tags_counts[[DIALOGUE, CHARACTER, SCENES_DESCRIPTION, SCENES_BOUNDARY]] == 0
+        ).any():
             self.coherent_parsing = False
         if len(self.list_characters) > 1000:
             self.coherent_parsing = False
@@ -311,100 +552,189 @@ class Script:
             self.check_parsing_is_coherent()
 
 
+class ScriptBuffer:
+    """Holds the text of a script along with the offsets of its lines, so that
+    scenes, dialogues and narration can refer to lines by their index and only
+    materialize them as strings when they are needed."""
+
+    def __init__(self, text: str):
+        self.text = text
+        line_ends = [match.start() for match in re.finditer("\n", text)]
+        line_ends.append(len(text))
+        self.line_ends = np.array(line_ends, dtype=np.int64)
+        self.line_starts = np.concatenate([[0], self.line_ends[:-1] + 1])
+
+    def __len__(self) -> int:
+        return len(self.line_ends)
+
+    def line(self, index: int) -> str:
+        return self.text[self.line_starts[index] : self.line_ends[index]]
+
+    def lines(self, start: int, stop: int) -> List[str]:
+        """Returns the lines from line start (included) to line stop (excluded)."""
+        if stop <= start:
+            return []
+        return self.text_between(start, stop).split("\n")
+
+    def text_between(self, start: int, stop: int) -> str:
+        """Returns the text from line start (included) to line stop (excluded)."""
+        if stop <= start:
+            return ""
+        return self.text[self.line_starts[start] : self.line_ends[stop - 1]]
+
+
 class Scene:
-    def __init__(self, list_lines, list_tags):
-        self.list_lines = list_lines
-        self.list_tags = list_tags
+    def __init__(self, script_buffer: ScriptBuffer, first_line: int, tags: np.ndarray):
+        self.script_buffer = script_buffer
+        self.first_line = first_line
+        # label codes of the lines of the scene
+        self.tags = tags
         self.list_characters_in_scene = []
         self.list_dialogues = []
-        self.list_narration = []
+        # indexes of the lines of each narrative passage
+        self.list_narration_indexes = []
+        self.is_elligible_characters_gender = False
+        self.is_elligible_topic = False
+        self.validating_dialogues_score_2 = []
+        self.validating_lines_score_2 = []
+        self.lines_with_male_words_score_2 = {}
+        self.validating_lines_score_3 = []
+        # what the details above were computed with, see Script.load_scenes_details
+        self.details_key: tuple = None
+        # whether each word searched was found in the lines of dialogues
+        self.words_in_dialogues: Dict[str, bool] = {}
+
+    def reset_details(self):
         self.is_elligible_characters_gender = False
         self.is_elligible_topic = False
         self.validating_dialogues_score_2 = []
         self.validating_lines_score_2 = []
         self.lines_with_male_words_score_2 = {}
         self.validating_lines_score_3 = []
+        self.details_key = None
+
+    @property
+    def list_lines(self) -> List[str]:
+        return self.script_buffer.lines(
+            self.first_line, self.first_line + len(self.tags)
+        )
 
-    def load_dialogues(self, characters_in_movie):
-        current_speech = []
+    @property
+    def list_tags(self) -> LabelsView:
+        return LabelsView(self.tags)
+
+    @property
+    def list_narration(self) -> List[str]:
+        return [
+            "".join([self.line(i).lstrip() for i in indexes])
+            for indexes in self.list_narration_indexes
+        ]
+
+    def line(self, index: int) -> str:
+        return self.script_buffer.line(self.first_line + index)
+
+    def load_dialogues(self, characters_by_name: Dict[str, "Character"]):
+        last_character_lines = self.find_last_character_lines()
+        self.words_in_dialogues = {}
         current_speaker = None
         current_index = []
-        for i, line in enumerate(self.list_lines):
-            if self.list_tags[i] == label.DIALOGUE:
+        for i, tag in enumerate(self.tags.tolist()):
+            if tag == DIALOGUE:
                 # new dialogue, we have to find who is speaking
-                if current_speech == []:
-                    current_speaker = self.find_speaker(i, characters_in_movie)
-                    current_speech.append(line.lstrip())
-                    current_index.append(i)
-                else:
-                    current_speech.append(line.lstrip())
-                    current_index.append(i)
+                if current_index == []:
+                    current_speaker = self.find_speaker(
+                        i, characters_by_name, last_character_lines
+                    )
+                current_index.append(i)
 
-            elif self.list_tags[i] == label.METADATA:
+            elif tag == METADATA:
                 pass  # we simply ignore metadata
 
             # if label is not dialogue nor metadata, then the ongoing dialogue is over
             else:
-                if current_speech != []:
+                if current_index != []:
                     # If we weren't able to identify speaker, then it's
                     # likely because the line is not a real dialogue
                     if current_speaker != None:
                         self.list_dialogues.append(
-                            Dialogue(current_speaker, current_speech, current_index)
+                            Dialogue(current_speaker, self, current_index)
                         )
                     current_speaker = None
-                    current_speech = []
                     current_index = []
 
     def load_narration(self):
-        current_narration = ""
-        for i, line in enumerate(self.list_lines):
-            if self.list_tags[i] == label.SCENES_DESCRIPTION:
+        current_narration = []
+        for i, tag in enumerate(self.tags.tolist()):
+            if tag == SCENES_DESCRIPTION:
                 # new narrative passage
-                current_narration += line.lstrip()
+                current_narration.append(i)
 
-            elif self.list_tags[i] == label.METADATA:
+            elif tag == METADATA:
                 pass  # we simply ignore metadata
 
-            elif self.list_tags[i] == label.SCENES_BOUNDARY:
+            elif tag == SCENES_BOUNDARY:
                 pass  # we simply ignore boundaries
 
             # if label is not narration nor metadata, then the ongoing narration is over
             else:
-                if current_narration != "":
-                    self.list_narration.append(current_narration)
-                    current_narration = ""
+                if current_narration != [] and any(
+                    self.line(index).strip() for index in current_narration
+                ):
+                    self.list_narration_indexes.append(current_narration)
+                current_narration = []
+
+    def find_last_character_lines(self) -> np.ndarray:
+        """For each line, finds the closest line tagged character above it (or the
+        line itself) which is only followed by metadata or empty lines until it, the
+        first line of the scene being ignored.
 
-    def find_speaker(self, dialogue_beginning_index: int, characters_in_movie: List):
+        Returns:
+            np.ndarray: for each line, the index of this line tagged character,
+                or -1 if there is none.
+        """
+        indexes = np.arange(len(self.tags))
+        is_character = self.tags == CHARACTER
+        # lines which can't be between a character and their dialogue
+        is_interruption = ~np.isin(self.tags, (CHARACTER, METADATA, EMPTY_LINE))
+        if len(self.tags) > 0:
+            is_character[0] = False
+            is_interruption[0] = True
+        last_character = np.maximum.accumulate(np.where(is_character, indexes, -1))
+        last_interruption = np.maximum.accumulate(
+            np.where(is_interruption, indexes, -1)
+        )
+        return np.where(last_character > last_interruption, last_character, -1)
+
+    def find_speaker(
+        self,
+        dialogue_beginning_index: int,
+        characters_by_name: Dict[str, "Character"],
+        last_character_lines: np.ndarray = None,
+    ):
         """Searches a line tagged character before the dialogue beginning index, and
         matches this line to the corresponding character among the characters of the movie
 
         Args:
             dialogue_beginning_index (int): index of the beginning of the dialogue whose speaker
                 we are trying to identify
-            characters_in_movie (List[Character]): list of characters in the movie
+            characters_by_name (Dict[str, Character]): characters of the movie, by
+                name variation
+            last_character_lines (np.ndarray, optional): result of
+                find_last_character_lines, computed if not given.
 
         Returns:
             Union[Character, None]: The speaker of the dialogue, if found, else None
         """
-        # We check the line above, if it's a character name, then it is the speaker
-        search_index = dialogue_beginning_index - 1
-        while search_index > 0 and self.list_tags[search_index] in [
-            label.CHARACTER,
-            label.METADATA,
-            label.EMPTY_LINE,
-        ]:
-            if self.list_tags[search_index] == label.CHARACTER:
-                speaker_name = self.list_lines[search_index].lstrip()
-                # in theory, each name variation should correspond to only one character
-                current_speaker = [
-                    character
-                    for character in characters_in_movie
-                    if speaker_name in character.name_variation
-                ][0]
-                return current_speaker
-            search_index -= 1
-        return None
+        if dialogue_beginning_index == 0:
+            return None
+        if last_character_lines is None:
+            last_character_lines = self.find_last_character_lines()
+        # the closest line above which is a character name, with only metadata or
+        # empty lines in between, is the speaker
+        speaker_line = last_character_lines[dialogue_beginning_index - 1]
+        if speaker_line == -1:
+            return None
+        return characters_by_name[self.line(speaker_line).lstrip()]
 
     def is_elligible_characters_gender_method(
         self,
@@ -477,8 +807,7 @@ class Scene:
 
     def is_elligible_topic_method(
         self,
-        males_names,
-        masculine_words,
+        masculine_lexicon: MasculineLexicon,
         whole_discussion: bool,
         number_of_lines_in_a_row: int,
     ):
@@ -486,18 +815,16 @@ class Scene:
             return
 
         if whole_discussion:
-            self.is_elligible_topic = self.are_dialogues_about_men(
-                males_names, masculine_words
-            )
+            self.is_elligible_topic = self.are_dialogues_about_men(masculine_lexicon)
         else:
             self.is_elligible_topic = self.are_two_successive_lines_about_men(
-                males_names, masculine_words, number_of_lines_in_a_row
+                masculine_lexicon, number_of_lines_in_a_row
             )
 
     # Hard criteria : no mentionning of men in all scene
-    def are_dialogues_about_men(self, males_names, masculine_words):
+    def are_dialogues_about_men(self, masculine_lexicon: MasculineLexicon):
         list_speak_about_men = [
-            dialogue.speaks_about_men(masculine_words, males_names)
+            dialogue.speaks_about_men(masculine_lexicon)
             for dialogue in self.list_dialogues
         ]
         if True in list_speak_about_men:
@@ -510,13 +837,12 @@ class Scene:
     # Here, only two successive dialogue lines are sufficient to validate criteria 3 of the bechdel test
     def are_two_successive_lines_about_men(
         self,
-        males_names,
-        masculine_words,
+        masculine_lexicon: MasculineLexicon,
         number_of_lines_in_a_row,
     ):
         list_speak_about_men = [
             (
-                dialogue.speaks_about_men(masculine_words, males_names),
+                dialogue.speaks_about_men(masculine_lexicon),
                 dialogue.character,
                 dialogue.indexes,
             )
@@ -547,24 +873,37 @@ class Scene:
                 # break
         return is_elligible
 
-    def load_scene_buzz_words(
-        self,
-        males_names,
-        masculine_words,
-    ):
+    def words_about_men_in_dialogues(
+        self, masculine_lexicon: MasculineLexicon
+    ) -> Tuple[str]:
+        """Returns the words about men which may be found in the lines of dialogues of
+        the scene, in the order of the lexicon."""
+        words_in_dialogues = self.words_in_dialogues
+        clean_dialogues_text = None
+        for word in masculine_lexicon:
+            if word not in words_in_dialogues:
+                if clean_dialogues_text is None:
+                    clean_dialogues_text = "".join(
+                        clean_text(line, strip=False, add_spaces_to_extremities=True)
+                        for dialogue in self.list_dialogues
+                        for line in dialogue.speech_list
+                    )
+                words_in_dialogues[word] = " " + word + " " in clean_dialogues_text
+        return tuple(word for word in masculine_lexicon if words_in_dialogues[word])
+
+    def load_scene_buzz_words(self, masculine_lexicon: MasculineLexicon):
         self.lines_with_male_words_score_2 = {}
         for dialogue in self.validating_dialogues_score_2:
             if dialogue.character.gender != "f":
                 pass
-            dialogue.get_buzz_words(
-                masculine_words,
-                males_names,
-            )
+            dialogue.get_buzz_words(masculine_lexicon)
             for k, v in dialogue.buzz_words.items():
                 self.lines_with_male_words_score_2[k] = v
 
     def __repr__(self) -> str:
-        return "\n".join(self.list_lines)
+        return self.script_buffer.text_between(
+            self.first_line, self.first_line + len(self.tags)
+        )
 
 
 class Character:
@@ -589,101 +928,197 @@ class Character:
     def add_name_variation(self, other):
         self.name_variation.add(other)
 
-    def fill_is_named(self, list_list_dialogues):
+    def fill_is_named(self, names_in_dialogues: Set[str]):
         self.is_named = False
-        # transform dialogues of all movie in one string
-        concatenated_dialogues = " ".join(
-            [
-                " ".join([dialogue.speech_text for dialogue in scene])
-                for scene in list_list_dialogues
-            ]
-        )
         for name_variation in self.name_variation:
-            if name_variation.capitalize() in concatenated_dialogues:
+            if name_variation.capitalize() in names_in_dialogues:
                 self.is_named = True
 
     def __repr__(self) -> str:
         return self.name
 
 
+class _CharacterIndexNode:
+    __slots__ = ("children", "first_index", "name_index")
+
+    def __init__(self, first_index: int):
+        self.children = {}
+        # index of the first character whose name goes through this node
+        self.first_index = first_index
+        # index of the character whose name ends at this node
+        self.name_index = None
+
+
+class CharacterIndex:
+    """Prefix tree over the names of the characters of a script, to find the first
+    character (in the order they were added) whose name begins with a given name
+    or is the beginning of this name, in a time proportional to the length of the
+    name instead of the number of characters."""
+
+    def __init__(self):
+        self.characters: List[Character] = []
+        self.root = None
+
+    def add(self, character: Character):
+        index = len(self.characters)
+        self.characters.append(character)
+        if self.root is None:
+            self.root = _CharacterIndexNode(index)
+        node = self.root
+        for letter in character.name:
+            if letter not in node.children:
+                node.children[letter] = _CharacterIndexNode(index)
+            node = node.children[letter]
+        if node.name_index is None:
+            node.name_index = index
+
+    def find(self, name: str) -> Union[Character, None]:
+        if self.root is None:
+            return None
+        first_index = len(self.characters)
+        node = self.root
+        for letter in name:
+            # the name of the character ending at this node is the beginning of name
+            if node.name_index is not None:
+                first_index = min(first_index, node.name_index)
+            node = node.children.get(letter)
+            if node is None:
+                break
+        else:
+            # all the names going through this node begin with name
+            first_index = min(first_index, node.first_index)
+        if first_index == len(self.characters):
+            return None
+        return self.characters[first_index]
+
+
 class Dialogue:
-    def __init__(self, character: Character, speech: List[str], indexes: List):
+    def __init__(self, character: Character, scene: Scene, indexes: List[int]):
         self.character = character
-        self.speech_list = speech
-        self.speech_text = " ".join(speech)
-        self.clean_speech_text = clean_text(self.speech_text)
+        self.scene = scene
         self.buzz_words = {}
         self.indexes = indexes
+        self.about_men: bool = None
+        self.about_men_lexicon: MasculineLexicon = None
+        # tokens of the dialogues of the script, and index of this dialogue in them
+        self.tokens: TokenizedDialogues = None
+        self.tokens_index: int = None
 
-    def speaks_about_men(self, masculine_words, males_names: List[str]):
-        masculine_words = masculine_words + males_names
-        words = self.clean_speech_text.split(" ")
-        for word in words:
-            if word in masculine_words:
-                return True
-        return False
+    @property
+    def speech_list(self) -> List[str]:
+        return [self.scene.line(i).lstrip() for i in self.indexes]
+
+    @property
+    def speech_text(self) -> str:
+        return " ".join(self.speech_list)
+
+    @property
+    def clean_speech_text(self) -> str:
+        return clean_text(self.speech_text)
+
+    def speaks_about_men(self, masculine_lexicon: MasculineLexicon) -> bool:
+        # the answer is kept for the lexicon it was computed with
+        if self.about_men_lexicon is not masculine_lexicon:
+            if self.tokens is not None:
+                self.about_men = bool(
+                    self.tokens.about_men(masculine_lexicon)[self.tokens_index]
+                )
+            else:
+                self.about_men = masculine_lexicon.is_in(
+                    self.clean_speech_text.split(" ")
+                )
+            self.about_men_lexicon = masculine_lexicon
+        return self.about_men
 
-    def get_buzz_words(self, masculine_words, males_names: List[str]):
+    def get_buzz_words(self, masculine_lexicon: MasculineLexicon):
         self.buzz_words = {}  # reinitialization
-        masculine_words = masculine_words + males_names
-        for index_line, line in zip(self.indexes, self.speech_list):
-            clean_line = clean_text(line, strip=False, add_spaces_to_extremities=True)
-            for word in masculine_words:
-                count = 0
-                while (
-                    " " + word + " " in clean_line
-                ):  # to make sure word is not included in another word (Example: 'he' is in "Where have you been ?!")
-                    index_start = clean_line.index(
-                        " " + word + " "
-                    )  # a shift (decalage) is induced by the added space in clean_line
-                    index_end = index_start + len(word) + 1
-                    if index_line not in self.buzz_words.keys():
-                        self.buzz_words[index_line] = []
-                    self.buzz_words[index_line].append(
-                        (index_start, index_end, word, line)
-                    )
-                    clean_line = (
-                        clean_line[: index_start + 1]
-                        + " " * len(word)
-                        + clean_line[index_end:]
-                    )
-                    count += 1
-                    if count > 1000:
-                        raise ValueError("Code likely stuck in this while loop")
+        # words made of several words can't be found in the tokens
+        if self.tokens is not None and not masculine_lexicon.has_phrases:
+            lines_spans = self.tokens.find_spans(self.tokens_index, masculine_lexicon)
+        else:
+            lines_spans = map(masculine_lexicon.find_spans, self.speech_list)
+        for index_line, spans in zip(self.indexes, lines_spans):
+            if spans:
+                self.buzz_words[index_line] = spans
 
     def __repr__(self) -> str:
         return f"{self.character} : {self.speech_text}"
 
 
 class All_Narration:
-    def __init__(self, list_contents: List[str], config):
-        self.list_contents = list_contents
+    def __init__(self, list_scenes: List[Scene], config):
+        self.list_scenes = list_scenes
         self.config = config
-        self.tokens = import_gender_tokens(self.config)
+        self.tokens = get_gender_tokens(self.config)
+        self.gender_tokens = GenderTokens(self.tokens)
+        # gender of each narrative passage once computed, kept by index rather than by
+        # text so that the passages are tokenized once without being kept in memory
+        self.paragraphs_genders: List[str] = [None] * sum(
+            len(scene.list_narration_indexes) for scene in list_scenes
+        )
+
+    @property
+    def list_contents(self) -> List[str]:
+        return [
+            narration
+            for scene in self.list_scenes
+            for narration in scene.list_narration
+        ]
 
     def character_narrative_gender(self, name: str):
-        return naive_narrative_gender(self.list_contents, name, self.tokens)
-
-    def character_coref_gender(self, name: str, pronouns):
-        res = None
-        freq = {}
-        clean_name = []
-        for key in pronouns.keys():
-            if name.lower() in str(key).lower():
-                clean_name.append(key)
-        if clean_name != []:
-            for clean in clean_name:
-                for key in pronouns[clean]:
-                    if str(key).lower() in self.tokens[0].values:
-                        gen = self.tokens.loc[self.tokens[0] == str(key).lower()][
-                            1
-                        ].values[0]
-                        try:
-                            freq[gen] += 1
-                        except:
-                            freq[gen] = 1
+        return self.characters_narrative_gender([name])[name]
+
+    def characters_narrative_gender(self, names: List[str]) -> Dict[str, str]:
+        return naive_narrative_genders(
+            self.list_contents, names, self.gender_tokens, self.paragraphs_genders
+        )
+
+    def characters_proximity_gender(
+        self, names: List[str], window: int
+    ) -> Dict[str, str]:
+        return proximity_genders(self.list_contents, names, self.gender_tokens, window)
+
+    def character_coref_gender(self, name: str, pronouns: Dict[str, Set[str]]):
+        return self.characters_coref_gender([name], pronouns)[name]
+
+    def characters_coref_gender(
+        self, names: List[str], pronouns: Dict[str, Set[str]]
+    ) -> Dict[str, str]:
+        """Returns the gender of the most frequent gendered mentions in the coreferences
+        whose main mention contains the name of each character, or its narrative gender
+        if there are none.
+
+        Args:
+            names (List[str]): names of the characters
+            pronouns (Dict[str, Set[str]]): mentions of each main mention, see
+                list_pronouns_coref
+
+        Returns:
+            Dict[str, str]: gender of each character
+        """
+        token_gender = self.gender_tokens.gender
+        # the main mentions are indexed by the lowercased names they contain
+        matcher = MultiPatternMatcher(name.lower() for name in names)
+        freq_by_name = {name.lower(): {} for name in names}
+        for key, mentions in pronouns.items():
+            names_in_key = matcher.find_all(str(key).lower())
+            if not names_in_key:
+                continue
+            genders = [
+                token_gender[mention]
+                for mention in (str(mention).lower() for mention in mentions)
+                if mention in token_gender
+            ]
+            for name in names_in_key:
+                freq = freq_by_name[name]
+                for gen in genders:
+                    freq[gen] = freq.get(gen, 0) + 1
+        res = {}
+        for name in names:
+            freq = freq_by_name[name.lower()]
             if freq != {}:
-                res = max(freq, key=lambda k: freq[k])
-        if res == None:
-            res = self.character_narrative_gender(name)
+                res[name] = max(freq, key=lambda k: freq[k])
+        without_coref = [name for name in names if name not in res]
+        if without_coref:
+            res.update(self.characters_narrative_gender(without_coref))
         return res
@@ -0,0 +1,144 @@
+# prevents the typing to be read during execution, necessary because of circular imports issue
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator, List, NamedTuple, Union
+
+import numpy as np
+from tqdm import tqdm
+
+# each process loads the parsing model when the scripts may be reparsed with it,
+# which takes a lot of memory, so fewer processes are used by default
+DEFAULT_WORKERS_WITH_ML = 2
+
+
+class ParsedScript(NamedTuple):
+    """Compact result of the parsing of a script, cheap to send back from a worker
+    process : the scenes are described by their number of lines, and the labels
+    of all the lines are stored as uint8 codes in a single array.
+    If the parsing failed, error contains the description of the exception and
+    the other fields are empty."""
+
+    path: str
+    scenes_sizes: np.ndarray
+    tags: np.ndarray
+    coherent_parsing: Union[bool, None]
+    error: Union[str, None] = None
+
+
+def parse_script(
+    path: str, config: dict, reparse_if_incoherent: bool = True
+) -> ParsedScript:
+    """Parses the script at the given path into scenes and labels, identifies its
+    characters and checks whether the parsing seems coherent, reparsing it with the
+    machine learning method if it doesn't and if the config allows it.
+
+    Args:
+        path (str): path of the script
+        config (dict): config yaml file imported as a dict
+        reparse_if_incoherent (bool, optional): whether the script should be reparsed
+            with the machine learning method when its parsing seems incoherent (and
+            config["used_methods"]["reparse_with_ml"] is true). Defaults to True.
+
+    Returns:
+        ParsedScript: the parsing of the script, or the error which happened while
+            parsing it.
+    """
+    from screenplay_classes import Script
+
+    try:
+        script = Script.from_path(path, config)
+        script.load_scenes()
+        script.identify_characters()
+        script.check_parsing_is_coherent()
+        if reparse_if_incoherent:
+            script.reparse_if_incoherent()
+    except Exception as e:
+        return ParsedScript(
+            path,
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.uint8),
+            None,
+            f"{type(e).__name__}: {e}",
+        )
+    return ParsedScript(
+        path,
+        np.array([len(scene.tags) for scene in script.list_scenes], dtype=np.int32),
+        script.tags,
+        script.coherent_parsing,
+    )
+
+
+def iter_parse_corpus(
+    paths: List[str],
+    config: dict,
+    workers: int = None,
+    chunksize: int = None,
+    reparse_if_incoherent: bool = True,
+) -> Iterator[ParsedScript]:
+    """Parses scripts on a pool of processes, yielding their parsing in the order of
+    the given paths as soon as they are available.
+
+    Args:
+        paths (List[str]): paths of the scripts
+        config (dict): config yaml file imported as a dict
+        workers (int, optional): number of processes, the scripts are parsed in
+            the current process if it is 1. Defaults to the number of cores, and to
+            at most DEFAULT_WORKERS_WITH_ML if the scripts may be reparsed with the
+            machine learning method.
+        chunksize (int, optional): number of scripts sent at once to a process.
+            Defaults to a fourth of the scripts of each process.
+        reparse_if_incoherent (bool, optional): see parse_script. Defaults to True.
+
+    Yields:
+        Iterator[ParsedScript]: the parsing of each script, see parse_script.
+    """
+    parse = partial(
+        parse_script, config=config, reparse_if_incoherent=reparse_if_incoherent
+    )
+    if workers is None:
+        workers = os.cpu_count() or 1
+        if reparse_if_incoherent and config["used_methods"]["reparse_with_ml"]:
+            workers = min(workers, DEFAULT_WORKERS_WITH_ML)
+    workers = max(1, min(workers, len(paths)))
+    if workers == 1:
+        yield from map(parse, paths)
+        return
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(paths) / (4 * workers)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(parse, paths, chunksize=chunksize)
+
+
+def parse_corpus(
+    paths: List[str],
+    config: dict,
+    workers: int = None,
+    chunksize: int = None,
+    reparse_if_incoherent: bool = True,
+    progress_bar: bool = True,
+) -> List[ParsedScript]:
+    """Parses scripts on a pool of processes, see iter_parse_corpus.
+
+    Args:
+        paths (List[str]): paths of the scripts
+        config (dict): config yaml file imported as a dict
+        workers (int, optional): number of processes, see iter_parse_corpus.
+        chunksize (int, optional): number of scripts sent at once to a process.
+            Defaults to a fourth of the scripts of each process.
+        reparse_if_incoherent (bool, optional): see parse_script. Defaults to True.
+        progress_bar (bool, optional): whether to display a progress bar.
+            Defaults to True.
+
+    Returns:
+        List[ParsedScript]: the parsing of each script, in the order of paths.
+    """
+    parsed_scripts = iter_parse_corpus(
+        paths, config, workers, chunksize, reparse_if_incoherent
+    )
+    if progress_bar:
+        parsed_scripts = tqdm(parsed_scripts, total=len(paths))
+    return list(parsed_scripts)
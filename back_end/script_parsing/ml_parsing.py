@@ -4,6 +4,7 @@ from typing import List, Tuple, Union
 import torch
 from torch.utils.data import DataLoader
 
+from resources import get_parsing_model
 from script_parsing.fine_tuning import (
     fine_tune_parsing_model,
     load_model_from_checkpoint,
@@ -30,7 +31,7 @@ def tag_script_with_ml(
             tuple is a list of scenes, each scene being a list of lines.
             The second element returned is the list of labels for each line.
     """
-    model = get_trained_model(config)
+    model = get_parsing_model(config)
 
     lines_list = script_text.split("\n")
     list_tags = predict_tag_of_lines(config, model, lines_list)
@@ -1,8 +1,12 @@
+import io
+import mmap
 import os
 import re
-from collections import Counter
+from collections.abc import Sequence
 from enum import Enum
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
 import numpy as np
 
@@ -37,6 +41,45 @@ class label(Enum):
         return self._label_id_
 
 
+# labels are stored as uint8 codes in arrays, the code of a label being its position
+# in LABELS
+LABELS = list(label)
+LABEL_CODES = {tag: code for code, tag in enumerate(LABELS)}
+
+
+def encode_tags(tags: Iterable[label]) -> np.ndarray:
+    """Converts a list of labels into an array of label codes."""
+    return np.fromiter((LABEL_CODES[tag] for tag in tags), dtype=np.uint8)
+
+
+class LabelsView(Sequence):
+    """Read-only sequence of labels over an array of label codes, for the code
+    which works with label members rather than codes."""
+
+    def __init__(self, codes: np.ndarray):
+        self.codes = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LabelsView(self.codes[index])
+        return LABELS[self.codes[index]]
+
+    def __iter__(self) -> Iterator[label]:
+        return map(LABELS.__getitem__, self.codes.tolist())
+
+    def __contains__(self, tag) -> bool:
+        return tag in LABEL_CODES and bool((self.codes == LABEL_CODES[tag]).any())
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 LABELS_PRIORITY = [
     label.CHARACTER,
     label.SCENES_BOUNDARY,
@@ -87,28 +130,272 @@ def tag_script(script_text: str) -> Tuple[List[List[str]], List[List[label]]]:
 
     lines = script_text.split("\n")
     scenes = find_scenes(lines)
+    line_features = LineFeatures(lines)
 
-    indents = get_indents_list(lines)
     # We remove the first and last scenes (which often contain the title of
     # the movie etc.), then we assign a label to each indent level
     if len(scenes) > 2:
-        middle_indents = indents[len(scenes[0]) : -len(scenes[-1])]
-        middle_lines = sum(scenes[1:-1], [])
+        middle = slice(len(scenes[0]), len(lines) - len(scenes[-1]))
     else:
-        middle_indents = indents
-        middle_lines = lines
+        middle = slice(0, len(lines))
 
     characterized_indent_levels = characterize_indent_levels(
-        middle_lines, middle_indents
+        lines[middle],
+        line_features.indents[middle],
+        line_features=line_features[middle],
     )
 
     tags = []
+    scene_start = 0
     for scene in scenes:
-        tags.append(tag_lines(scene, characterized_indent_levels))
+        scene_end = scene_start + len(scene)
+        tags.append(
+            tag_lines(
+                scene,
+                characterized_indent_levels,
+                line_features=line_features[scene_start:scene_end],
+            )
+        )
+        scene_start = scene_end
 
     return scenes, tags
 
 
+def iter_tag_script(
+    script_source: Union[str, mmap.mmap, Iterable[str]], sample_size: int = None
+) -> Iterator[Tuple[List[str], List[label]]]:
+    """Generator version of tag_script, the scenes are yielded one at a time along
+    with their labels so that the lines and labels of the whole script are never
+    held in memory at once.
+
+    The indent levels are characterized during a first pass over the script (leaving
+    out the first and last scenes as in tag_script), or only on its first sample_size
+    lines if sample_size is given. The script is then read a second time to yield
+    the scenes.
+
+    Args:
+        script_source (Union[str, mmap.mmap, Iterable[str]]): path of the script,
+            text file opened in read mode, memory-mapped file, or iterable of lines
+            (without line breaks). An iterable that can only be read once, such as
+            a generator, requires a sample_size since the sample has to be buffered.
+        sample_size (int, optional): number of lines used to characterize the
+            indent levels, the whole script is used if None. Defaults to None.
+
+    Yields:
+        Iterator[Tuple[List[str], List[label]]]: the lines of each scene and
+            the label of each of these lines
+    """
+    read_lines = get_lines_reader(script_source, sample_size)
+
+    lines = read_lines()
+    if sample_size is not None:
+        lines = islice(lines, sample_size)
+    characterized_indent_levels = characterize_indent_levels_from_scenes(
+        iter_scenes(lines)
+    )
+
+    for scene in iter_scenes(read_lines()):
+        yield scene, tag_lines(scene, characterized_indent_levels)
+
+
+def get_lines_reader(
+    script_source: Union[str, mmap.mmap, Iterable[str]], sample_size: int = None
+) -> Callable[[], Iterator[str]]:
+    """Returns a function which reads the lines of the script from the beginning
+    each time it is called, the lines being split as with script_text.split("\\n").
+    See iter_tag_script for the accepted sources."""
+    if isinstance(script_source, str):
+
+        def read_lines():
+            with open(script_source, "r", encoding="utf-8") as f:
+                yield from split_raw_lines(f)
+
+    elif isinstance(script_source, mmap.mmap):
+
+        def read_lines():
+            script_source.seek(0)
+            # the line breaks are translated as when the file is opened in text mode,
+            # a lone "\r" ending a line too
+            yield from split_raw_lines(
+                line
+                for raw_line in iter(script_source.readline, b"")
+                for line in io.StringIO(raw_line.decode("utf-8"), newline=None)
+            )
+
+    elif hasattr(script_source, "seek") and hasattr(script_source, "tell"):
+        beginning = script_source.tell()
+
+        def read_lines():
+            script_source.seek(beginning)
+            yield from split_raw_lines(script_source)
+
+    elif iter(script_source) is not script_source:  # e.g. a list of lines
+
+        def read_lines():
+            return iter(script_source)
+
+    else:
+        if sample_size is None:
+            raise ValueError(
+                "A sample_size must be given to tag a script from an iterator "
+                "that can only be read once."
+            )
+        sample = list(islice(script_source, sample_size))
+        nb_reads = 0
+
+        def read_lines():
+            nonlocal nb_reads
+            nb_reads += 1
+            if nb_reads == 1:
+                return iter(sample)
+            return chain(sample, script_source)
+
+    return read_lines
+
+
+def split_raw_lines(raw_lines: Iterable[str]) -> Iterator[str]:
+    """Removes the line break at the end of lines read from a file, and yields an
+    empty last line if the text ends with a line break (or is empty), as does
+    str.split("\\n")."""
+    last_line_ended = True
+    for raw_line in raw_lines:
+        last_line_ended = raw_line.endswith("\n")
+        yield raw_line[:-1] if last_line_ended else raw_line
+    if last_line_ended:
+        yield ""
+
+
+def characterize_indent_levels_from_scenes(
+    scenes: Iterable[List[str]],
+) -> Dict[int, label]:
+    """Characterizes the indent levels from scenes read one at a time. As in tag_script,
+    the first and last scenes are left out if there are more than two scenes, the
+    last scene being only known once all the scenes were read.
+
+    Args:
+        scenes (Iterable[List[str]]): cleaned scenes of the script
+
+    Returns:
+        Dict[int, label]: a dictionnary containing the label assigned to each
+            indentation level (number of whitespaces being the keys)
+    """
+    # all the lines are only characterized if there are at most two scenes
+    all_lines_statistics = IndentLevelsStatistics()
+    middle_lines_statistics = IndentLevelsStatistics()
+    previous_scene = None
+    nb_scenes = 0
+    for scene in scenes:
+        if nb_scenes < 2:
+            all_lines_statistics.add_lines(scene)
+        # the previous scene is neither the first nor (as we know now) the last one
+        if nb_scenes >= 2:
+            middle_lines_statistics.add_lines(previous_scene)
+        previous_scene = scene
+        nb_scenes += 1
+
+    if nb_scenes > 2:
+        return middle_lines_statistics.characterize()
+    return all_lines_statistics.characterize()
+
+
+class SceneBoundaryScanner:
+    """Classifies lines as scene beginnings, scene endings or neither.
+
+    All the boundary keywords are compiled into a single pattern made of two
+    lookaheads with named groups, the beginning keywords being tried first. A line
+    containing both kinds of keywords is therefore classified as a beginning, as
+    it was when the keywords were searched one after the other.
+    """
+
+    NO_BOUNDARY = 0
+    BEGINNING = 1
+    ENDING = 2
+
+    def __init__(
+        self, beginning_scenes_keywords: List[str], end_scenes_keywords: List[str]
+    ):
+        self.beginning_scenes_keywords = tuple(beginning_scenes_keywords)
+        self.end_scenes_keywords = tuple(end_scenes_keywords)
+        self.pattern = re.compile(
+            r"(?:(?=[\s\S]*?(?P<beginning>{}))|(?=[\s\S]*?(?P<ending>{})))".format(
+                join_keywords(self.beginning_scenes_keywords),
+                join_keywords(self.end_scenes_keywords),
+            )
+        )
+
+    def classify(self, line: str) -> int:
+        """Returns SceneBoundaryScanner.BEGINNING if the line contains a keyword marking
+        the beginning of a scene, SceneBoundaryScanner.ENDING if it contains a keyword
+        marking the end of a scene, and SceneBoundaryScanner.NO_BOUNDARY otherwise."""
+        match = self.pattern.match(line)
+        if match is None:
+            return self.NO_BOUNDARY
+        if match.group("beginning") is not None:
+            return self.BEGINNING
+        return self.ENDING
+
+    def classify_lines(self, lines: List[str]) -> List[int]:
+        """Applies classify to each line, in a single pass over the lines."""
+        match = self.pattern.match
+        boundaries = []
+        for line in lines:
+            result = match(line)
+            if result is None:
+                boundaries.append(self.NO_BOUNDARY)
+            elif result.group("beginning") is not None:
+                boundaries.append(self.BEGINNING)
+            else:
+                boundaries.append(self.ENDING)
+        return boundaries
+
+    def split(self, lines: List[str]) -> List[List[str]]:
+        """Splits the list of lines into scenes (before they are cleaned)."""
+        return list(self.iter_split(lines))
+
+    def iter_split(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        """Same as split, the scenes being yielded one at a time."""
+        match = self.pattern.match
+        current_scene = []
+        for line in lines:
+            result = match(line)
+            if result is None:
+                current_scene.append(line)
+            elif result.group("beginning") is not None:
+                yield current_scene
+                current_scene = [line]
+            else:
+                current_scene.append(line)
+                yield current_scene
+                current_scene = []
+        yield current_scene
+
+
+def join_keywords(keywords: List[str]) -> str:
+    """Joins regex keywords into a single alternation. An empty list of keywords
+    gives a pattern that never matches."""
+    if len(keywords) == 0:
+        return "(?!)"
+    return "|".join(f"(?:{keyword})" for keyword in keywords)
+
+
+@lru_cache(maxsize=32)
+def _get_scene_boundary_scanner(
+    beginning_scenes_keywords: Tuple[str], end_scenes_keywords: Tuple[str]
+) -> SceneBoundaryScanner:
+    return SceneBoundaryScanner(beginning_scenes_keywords, end_scenes_keywords)
+
+
+def get_scene_boundary_scanner(
+    beginning_scenes_keywords: List[str] = BEGINNING_SCENES_KEYWORDS,
+    end_scenes_keywords: List[str] = ENDING_SCENES_KEYWORDS,
+) -> SceneBoundaryScanner:
+    """Returns the scanner for the given keywords, the compiled scanner being
+    cached for each set of keywords."""
+    return _get_scene_boundary_scanner(
+        tuple(beginning_scenes_keywords), tuple(end_scenes_keywords)
+    )
+
+
 def find_scenes(
     lines: List[str],
     beginning_scenes_keywords: List[str] = BEGINNING_SCENES_KEYWORDS,
@@ -119,7 +406,7 @@ def find_scenes(
     the beginning and the end of the keywords.
 
     Args:
-        lines (List[str]): _description_
+        lines (List[str]): list of lines from the script
         beginning_scenes_keywords (List[str], optional): list of keywords usually found
             to mark the beginning of a scene. Defaults to BEGINNING_SCENES_KEYWORDS.
         end_scenes_keywords (List[str], optional): list of keywords usually found
@@ -128,27 +415,8 @@ def find_scenes(
     Returns:
         List[List[str]]: List of scenes, each scene being a list of lines.
     """
-    scenes = []
-    current_scene = []
-    for line in lines:
-        has_keyword = False
-        for keyword in beginning_scenes_keywords + end_scenes_keywords:
-            if re.search(keyword, line):
-                if keyword in beginning_scenes_keywords:
-                    scenes.append(current_scene)
-                    current_scene = [line]
-                    has_keyword = True
-                    break
-                elif keyword in end_scenes_keywords:
-                    current_scene.append(line)
-                    scenes.append(current_scene)
-                    current_scene = []
-                    has_keyword = True
-                    break
-        if not has_keyword:
-            current_scene.append(line)
-    scenes.append(current_scene)
-    return clean_scenes(scenes)
+    scanner = get_scene_boundary_scanner(beginning_scenes_keywords, end_scenes_keywords)
+    return clean_scenes(scanner.split(lines))
 
 
 def clean_scenes(scenes: List[List[str]]) -> List[List[str]]:
@@ -162,6 +430,27 @@ def clean_scenes(scenes: List[List[str]]) -> List[List[str]]:
     return cleaned_scenes
 
 
+def iter_scenes(
+    lines: Iterable[str],
+    beginning_scenes_keywords: List[str] = BEGINNING_SCENES_KEYWORDS,
+    end_scenes_keywords: List[str] = ENDING_SCENES_KEYWORDS,
+) -> Iterator[List[str]]:
+    """Generator version of find_scenes, the scenes are yielded as soon as they are
+    complete. A scene is only yielded once the next one is known not to be made
+    of empty lines only, since such a scene is merged with the previous one."""
+    scanner = get_scene_boundary_scanner(beginning_scenes_keywords, end_scenes_keywords)
+    previous_scene = None
+    for scene in scanner.iter_split(lines):
+        if previous_scene is not None and len("".join(scene)) == 0:
+            previous_scene += scene
+        else:
+            if previous_scene is not None:
+                yield previous_scene
+            previous_scene = scene
+    if previous_scene is not None:
+        yield previous_scene
+
+
 def get_indents_list(lines: List[str]) -> List[int]:
     """Given a list of lines, returns a list of the number of white spaces
     that was before the text in each line. If the line is empty (i.e.
@@ -186,8 +475,177 @@ def get_indents_list(lines: List[str]) -> List[int]:
     return indents
 
 
+class LineFeatures:
+    """Table of the features of each line of a script, stored as NumPy arrays so that
+    it is computed once per script and can be sliced without copy. For each line it
+    contains the indent (-1 for empty lines), the length of the text without the left
+    whitespaces, the number of capitalized letters and the number of letters."""
+
+    def __init__(self, lines: List[str] = None):
+        if lines is None:  # empty table, filled by __getitem__
+            return
+        self.indents = np.array(get_indents_list(lines), dtype=np.int64)
+        self.text_lengths = np.array(
+            [len(line.lstrip()) for line in lines], dtype=np.int64
+        )
+        self.upper_counts, self.letter_counts = count_letters_in_lines(lines)
+
+    def __len__(self) -> int:
+        return len(self.indents)
+
+    def __getitem__(self, lines_slice: slice) -> "LineFeatures":
+        line_features = LineFeatures()
+        line_features.indents = self.indents[lines_slice]
+        line_features.text_lengths = self.text_lengths[lines_slice]
+        line_features.upper_counts = self.upper_counts[lines_slice]
+        line_features.letter_counts = self.letter_counts[lines_slice]
+        return line_features
+
+
+KEYWORDS_FAMILIES = {
+    "characters": CHARACTER_KEYWORDS,
+    "scenes_beginning": BEGINNING_SCENES_KEYWORDS,
+    "scenes_ending": ENDING_SCENES_KEYWORDS,
+    "meta": META_KEYWORDS,
+    "dialogues": DIALOGUE_KEYWORDS,
+}
+
+
+def count_letters_in_lines(lines: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts the number of capitalized letters and the total number of letters
+    in each line. The lines are converted into a single array of code points, ASCII
+    characters are classified with a lookup table and only the other characters
+    are classified with str.isupper and str.islower.
+
+    Args:
+        lines (List[str]): list of lines from the script
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: number of capitalized letters and number of
+            letters for each line
+    """
+    text = "".join(lines)
+    code_points = np.frombuffer(
+        text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32
+    )
+    is_ascii = code_points < 128
+    is_upper = np.zeros(len(code_points), dtype=bool)
+    is_lower = np.zeros(len(code_points), dtype=bool)
+    is_upper[is_ascii] = _ASCII_IS_UPPER[code_points[is_ascii]]
+    is_lower[is_ascii] = _ASCII_IS_LOWER[code_points[is_ascii]]
+    for i in np.flatnonzero(~is_ascii):
+        is_upper[i] = text[i].isupper()
+        is_lower[i] = text[i].islower()
+
+    line_lengths = np.array([len(line) for line in lines], dtype=np.int64)
+    line_ends = np.cumsum(line_lengths)
+    line_starts = line_ends - line_lengths
+    cumulated_upper = np.concatenate([[0], np.cumsum(is_upper, dtype=np.int64)])
+    cumulated_letters = np.concatenate(
+        [[0], np.cumsum(is_upper | is_lower, dtype=np.int64)]
+    )
+    return (
+        cumulated_upper[line_ends] - cumulated_upper[line_starts],
+        cumulated_letters[line_ends] - cumulated_letters[line_starts],
+    )
+
+
+_ASCII_IS_UPPER = np.array([chr(i).isupper() for i in range(128)])
+_ASCII_IS_LOWER = np.array([chr(i).islower() for i in range(128)])
+
+
+class KeywordsScanner:
+    """Counts the occurences of keywords in lines given chunk by chunk, as re.findall
+    does for each keyword on all the lines joined with line breaks (see
+    occurences_keywords_in_groups), so that the lines don't need to be held in memory.
+    Only the end of the text where keywords may still be found is kept, keywords being
+    assumed not to span more than two lines."""
+
+    def __init__(self, keywords: List[str]):
+        self.family_pattern, self.patterns = compile_keywords(tuple(keywords))
+        self.count = 0
+        # end of the text, along with the position from which each keyword is
+        # searched in it. Once the beginning of the text was dropped, the character
+        # before the kept text is kept too, so that \b and ^ behave as in the full text
+        self.text = None
+        self.positions = [0] * len(self.patterns)
+
+    def add_lines(self, lines: List[str]):
+        text = "\n".join(lines)
+        if self.text is not None:
+            text = self.text + "\n" + text
+        # an occurence reaching the last line may change with the next lines (for
+        # example if it ends with $), it is only counted once they are known
+        count, self.positions = self.scan(text, len(text) - len(lines[-1]))
+        self.count += count
+
+        start = min(self.positions)
+        if start > 0:
+            text = text[start - 1 :]
+            self.positions = [position - start + 1 for position in self.positions]
+        self.text = text
+
+    def total(self) -> int:
+        """Returns the number of occurences in all the lines given."""
+        if self.text is None:
+            return 0
+        return self.count + self.scan(self.text)[0]
+
+    def scan(self, text: str, last_line_start: int = None) -> Tuple[int, List[int]]:
+        """Counts the occurences of the keywords in the text from self.positions. The
+        text is searched once for the whole family, each keyword being only tried
+        where one of them was found.
+
+        Args:
+            text (str): text containing the lines
+            last_line_start (int, optional): position of the last line in the text,
+                the occurences reaching it are not counted. Defaults to None, all the
+                occurences being counted.
+
+        Returns:
+            Tuple[int, List[int]]: the number of occurences, and the position from
+                which each keyword will be searched once the next lines are known
+        """
+        count = 0
+        positions = list(self.positions)
+        searched = list(range(len(self.patterns)))
+        position = min(positions)
+        while searched:
+            hit = self.family_pattern.search(text, position)
+            if hit is None:
+                break
+            start = hit.start()
+            for i in [i for i in searched if positions[i] <= start]:
+                match = self.patterns[i].match(text, start)
+                if match is None:
+                    continue
+                if last_line_start is not None and match.end() > last_line_start:
+                    positions[i] = start
+                    searched.remove(i)
+                else:
+                    count += 1
+                    positions[i] = max(match.end(), start + 1)
+            if searched:
+                position = max(start + 1, min(positions[i] for i in searched))
+        if last_line_start is not None:
+            for i in searched:
+                positions[i] = max(positions[i], last_line_start)
+        return count, positions
+
+
+@lru_cache(maxsize=32)
+def compile_keywords(keywords: Tuple[str]) -> Tuple[re.Pattern, List[re.Pattern]]:
+    """Compiles a family of keywords, both as a single alternation and one by one."""
+    return re.compile(join_keywords(keywords)), [
+        re.compile(keyword) for keyword in keywords
+    ]
+
+
 def characterize_indent_levels(
-    lines: List[str], indents: List[int], print_details: bool = False
+    lines: List[str],
+    indents: List[int],
+    print_details: bool = False,
+    line_features: LineFeatures = None,
 ) -> Dict[int, label]:
     """Given a script (or an extract of the script) as a list of lines, we try to
     identify for each level of indentation which label it should have. This method
@@ -200,34 +658,54 @@ def characterize_indent_levels(
         lines (List[str]): list of lines
         indents (List[int]): list of the number of white spaces found before
             the text in each line of lines
+        line_features (LineFeatures, optional): features of the lines, computed
+            from lines if not given. Defaults to None.
 
     Returns:
         Dict[int, label]: a dictionnary containing the label assigned to each
             indentation level (number of whitespaces being the keys)
     """
+    if line_features is None:
+        line_features = LineFeatures(lines)
 
-    relevant_indent_levels, groups = group_lines_by_indent_level(
-        lines, indents, minimum_occurences=0
-    )
-    mean_text_lengths = mean_text_length_in_groups(groups)
-    capitalized_frequency = frequency_capitalized_in_groups(groups)
-    characters_keywords_occurences = occurences_keywords_in_groups(
-        groups, CHARACTER_KEYWORDS
-    )
-    scenes_beginning_keywords_occurences = occurences_keywords_in_groups(
-        groups, BEGINNING_SCENES_KEYWORDS
-    )
-    scenes_ending_keywords_occurences = occurences_keywords_in_groups(
-        groups, ENDING_SCENES_KEYWORDS
-    )
-    meta_keywords_occurences = occurences_keywords_in_groups(groups, META_KEYWORDS)
-    dialogues_keywords_occurences = occurences_keywords_in_groups(
-        groups, DIALOGUE_KEYWORDS
-    )
+    statistics = IndentLevelsStatistics()
+    statistics.add_lines(lines, line_features)
+    return statistics.characterize(print_details)
+
+
+def label_indent_levels(
+    relevant_indent_levels: List[int],
+    groups_sizes: List[int],
+    mean_text_lengths: List[float],
+    capitalized_frequency: List[float],
+    keywords_occurences: Dict[str, List[int]],
+    print_details: bool = False,
+) -> Dict[int, label]:
+    """Assigns a label to each indent level given the statistics of the lines
+    of each level (see characterize_indent_levels).
+
+    Args:
+        relevant_indent_levels (List[int]): the indent levels
+        groups_sizes (List[int]): number of lines of each indent level
+        mean_text_lengths (List[float]): mean length of the lines of each level
+        capitalized_frequency (List[float]): frequency of capitalized letters
+            of each level
+        keywords_occurences (Dict[str, List[int]]): for each family of
+            KEYWORDS_FAMILIES, the number of keywords found in each level
+
+    Returns:
+        Dict[int, label]: a dictionnary containing the label assigned to each
+            indentation level (number of whitespaces being the keys)
+    """
+    characters_keywords_occurences = keywords_occurences["characters"]
+    scenes_beginning_keywords_occurences = keywords_occurences["scenes_beginning"]
+    scenes_ending_keywords_occurences = keywords_occurences["scenes_ending"]
+    meta_keywords_occurences = keywords_occurences["meta"]
+    dialogues_keywords_occurences = keywords_occurences["dialogues"]
 
     result = {}
 
-    for i, group in enumerate(groups):
+    for i, group_size in enumerate(groups_sizes):
         indent_level = relevant_indent_levels[i]
         result[indent_level] = []
         if indent_level == -1:
@@ -237,9 +715,9 @@ def characterize_indent_levels(
                 result[indent_level].append(label.CHARACTER)
             if scenes_beginning_keywords_occurences[i] > 0:
                 result[indent_level].append(label.SCENES_BOUNDARY_AND_DESCRIPTION)
-            if scenes_ending_keywords_occurences[i] / len(group) > 0.8:
+            if scenes_ending_keywords_occurences[i] / group_size > 0.8:
                 result[indent_level].append(label.SCENES_BOUNDARY)
-            if meta_keywords_occurences[i] / len(group) > 0.75:
+            if meta_keywords_occurences[i] / group_size > 0.75:
                 result[indent_level].append(label.METADATA)
             if (
                 capitalized_frequency[i] > 0.9
@@ -273,7 +751,7 @@ def characterize_indent_levels(
             "In": relevant_indent_levels,
             "Re": [tag.value for tag in result.values()],
             "Le": mean_text_lengths,
-            "Nb": [len(group) for group in groups],
+            "Nb": groups_sizes,
             "Ca": capitalized_frequency,
             "Ch": characters_keywords_occurences,
             "SB": scenes_beginning_keywords_occurences,
@@ -287,9 +765,130 @@ def characterize_indent_levels(
     return result
 
 
+class IndentLevelsStatistics:
+    """Sums of the features of the lines of each indent level, which can be
+    accumulated chunk by chunk (e.g. scene by scene) so that the indent levels
+    of a script can be characterized without keeping all its lines in memory.
+    The keywords are counted on the lines of each level joined with line breaks, a
+    keyword spanning two chunks being counted as if the lines were given at once."""
+
+    def __init__(self):
+        # indent level -> sums of the number of lines, text lengths, capitalized
+        # letters and letters, in this order
+        self.sums: Dict[int, np.ndarray] = {}
+        # indent level -> family of KEYWORDS_FAMILIES -> keywords found
+        self.keywords: Dict[int, Dict[str, KeywordsScanner]] = {}
+
+    def add_lines(self, lines: List[str], line_features: LineFeatures = None):
+        if line_features is None:
+            line_features = LineFeatures(lines)
+        indent_groups = IndentGroups(line_features.indents)
+        columns = [
+            np.ones(len(line_features), dtype=np.int64),
+            line_features.text_lengths,
+            line_features.upper_counts,
+            line_features.letter_counts,
+        ]
+        groups_sums = np.array([indent_groups.sum(column) for column in columns]).T
+        for level, level_sums, indexes in zip(
+            indent_groups.levels, groups_sums, indent_groups.indexes
+        ):
+            if level in self.sums:
+                self.sums[level] = self.sums[level] + level_sums
+            else:
+                self.sums[level] = level_sums
+                self.keywords[level] = {
+                    family: KeywordsScanner(keywords)
+                    for family, keywords in KEYWORDS_FAMILIES.items()
+                }
+            # the empty lines can't contain keywords, and searching all of them
+            # joined is slow since some keywords begin with whitespaces
+            if level == -1:
+                continue
+            level_lines = [lines[i] for i in indexes]
+            for keywords_scanner in self.keywords[level].values():
+                keywords_scanner.add_lines(level_lines)
+
+    def characterize(self, print_details: bool = False) -> Dict[int, label]:
+        """Same as characterize_indent_levels, on the accumulated lines."""
+        groups_sizes = [int(level_sums[0]) for level_sums in self.sums.values()]
+        return label_indent_levels(
+            list(self.sums.keys()),
+            groups_sizes,
+            [
+                round(int(level_sums[1]) / size, 2)
+                for level_sums, size in zip(self.sums.values(), groups_sizes)
+            ],
+            [
+                round(int(level_sums[2]) / int(level_sums[3]), 2)
+                if level_sums[3] != 0
+                else 0
+                for level_sums in self.sums.values()
+            ],
+            {
+                family: [self.keywords[level][family].total() for level in self.sums]
+                for family in KEYWORDS_FAMILIES
+            },
+            print_details,
+        )
+
+
+class IndentGroups:
+    """Groups the lines by indent level with a single stable argsort of the indents.
+    Each group is a view on the sorted array of line indexes, so that no list of
+    lines is copied. The groups are kept in the order of first appearance of their
+    indent level.
+
+    Attributes:
+        levels (List[int]): the indent level of each group
+        indexes (List[np.ndarray]): the indexes of the lines of each group, in
+            increasing order
+        sizes (np.ndarray): the number of lines in each group
+        group_ids (np.ndarray): the group of each line, -1 if the group of the
+            line was discarded
+    """
+
+    def __init__(self, indents: List[int], minimum_occurences: int = 0):
+        indents = np.asarray(indents, dtype=np.int64)
+        order = np.argsort(indents, kind="stable")
+        boundaries = np.flatnonzero(np.diff(indents[order])) + 1
+        starts = np.concatenate([[0], boundaries]).astype(np.int64)
+        sizes = np.diff(np.concatenate([starts, [len(indents)]]))
+        if len(indents) == 0:
+            starts, sizes = starts[:0], sizes[:0]
+        groups = np.split(order, boundaries)
+
+        # the first line of a group is its first appearance since the sort is stable
+        by_appearance = np.argsort(order[starts], kind="stable")
+        kept = by_appearance[sizes[by_appearance] > minimum_occurences]
+
+        self.levels = [int(level) for level in indents[order[starts[kept]]]]
+        self.indexes = [groups[group] for group in kept]
+        self.sizes = sizes[kept]
+        rank = np.full(len(starts), -1, dtype=np.int64)
+        rank[kept] = np.arange(len(kept))
+        self.group_ids = np.empty(len(indents), dtype=np.int64)
+        self.group_ids[order] = np.repeat(rank, sizes)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def sum(self, values: np.ndarray) -> List[int]:
+        """Sums the values of the lines of each group."""
+        kept_lines = self.group_ids >= 0
+        return [
+            int(total)
+            for total in np.bincount(
+                self.group_ids[kept_lines],
+                weights=np.asarray(values)[kept_lines],
+                minlength=len(self),
+            )
+        ]
+
+
 def group_lines_by_indent_level(
     lines: List[str], indents: List[int], minimum_occurences: int = 0
-) -> List[List[str]]:
+) -> Tuple[List[int], List[List[str]]]:
     """Splits a list of line into groups of lines such that each group
     contains all the lines that have the same level of indentation (i.e.
     the same number of left whitespaces)
@@ -301,20 +900,12 @@ def group_lines_by_indent_level(
             to minimum occurences will be discarded, defaults to 0 (=never discard)
 
     Returns:
-        List[List[str]]: groups containing all the lines with a given number
-            of indentations
+        Tuple[List[int], List[List[str]]]: the indent levels kept, and the groups
+            containing all the lines with a given number of indentations
     """
-    indents_counter = Counter(indents)
-    relevant_indent_levels = []
-    for indent_level in indents_counter:
-        if indents_counter[indent_level] > minimum_occurences:
-            relevant_indent_levels.append(indent_level)
-    groups = []
-    for indent_level in relevant_indent_levels:
-        lines_idxs = np.where(np.array(indents) == indent_level)[0]
-        group_lines = [lines[lines_idxs[i]] for i in range(len(lines_idxs))]
-        groups.append(group_lines)
-    return relevant_indent_levels, groups
+    indent_groups = IndentGroups(indents, minimum_occurences)
+    groups = [[lines[i] for i in indexes] for indexes in indent_groups.indexes]
+    return indent_groups.levels, groups
 
 
 def occurences_keywords_in_groups(
@@ -385,7 +976,9 @@ def mean_text_length_in_groups(groups: List[List[str]]) -> List[float]:
 
 
 def tag_lines(
-    list_lines: List[str], characterized_indent_levels: Dict[int, label]
+    list_lines: List[str],
+    characterized_indent_levels: Dict[int, label],
+    line_features: LineFeatures = None,
 ) -> List[label]:
     """Assign a label to each line in list_lines. In most cases the label
     assigned is the label corresponding to the label of its indentation level,
@@ -398,24 +991,31 @@ def tag_lines(
         list_lines (List[str]): list of lines
         characterized_indent_levels (Dict[int, label]): a dictionnary
             containing the label assigned to each indentation level
+        line_features (LineFeatures, optional): features of the lines, computed
+            from list_lines if not given. Defaults to None.
 
     Returns:
         List[label]: the list of labels for each line
     """
-    indents = get_indents_list(list_lines)
+    if line_features is None:
+        line_features = LineFeatures(list_lines)
     tags = []
-    for i, line in enumerate(list_lines):
-        if indents[i] in characterized_indent_levels:
+    for indent, upper_count, letter_count in zip(
+        line_features.indents.tolist(),
+        line_features.upper_counts.tolist(),
+        line_features.letter_counts.tolist(),
+    ):
+        if indent in characterized_indent_levels:
             if (
-                characterized_indent_levels[indents[i]]
+                characterized_indent_levels[indent]
                 == label.SCENES_BOUNDARY_AND_DESCRIPTION
             ):
-                if frequency_capitalized_in_groups([line])[0] > 0.8:
+                if letter_count != 0 and round(upper_count / letter_count, 2) > 0.8:
                     tags.append(label.SCENES_BOUNDARY)
                 else:
                     tags.append(label.SCENES_DESCRIPTION)
             else:
-                tags.append(characterized_indent_levels[indents[i]])
+                tags.append(characterized_indent_levels[indent])
         else:
             tags.append(label.UNKNOWN)
 
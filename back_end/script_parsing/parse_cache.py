@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Tuple, Union
+
+import configue
+import numpy as np
+
+from script_parsing.naive_parsing import KEYWORDS_FAMILIES, LABELS, LABELS_PRIORITY
+
+# to increment when the parsing changes in a way the keys don't capture, so that
+# the parsings computed before are not used anymore
+CACHE_VERSION = 2
+
+# size of the parsings in each cache folder as of the last scan plus the parsings
+# saved since, so that the folder is only scanned again when it may be too big.
+# The parsings saved by other processes are only counted at the next scan.
+_tracked_sizes: Dict[str, int] = {}
+
+
+def is_cache_enabled(config: dict) -> bool:
+    return config.get("parse_cache", {}).get("enabled", False)
+
+
+@lru_cache(maxsize=None)
+def _hash_file(path: str, modification_time: int, size: int) -> str:
+    # the modification time and the size are only part of the arguments so that the
+    # hash is computed again when the file changes
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def get_checkpoint_hash(config: dict) -> Union[str, None]:
+    """Returns the hash of the weights of the parsing model, or None if the model
+    has not been trained yet."""
+    checkpoint_path = os.path.join(
+        config["paths"]["input_folder_name"], config["names"]["parsing_model"]
+    )
+    if not os.path.exists(checkpoint_path):
+        return None
+    stat = os.stat(checkpoint_path)
+    return _hash_file(checkpoint_path, stat.st_mtime_ns, stat.st_size)
+
+
+def get_cache_key(
+    script_text: str, config: dict, with_ml: bool = False
+) -> Union[str, None]:
+    """Returns the key of the parsing of a script in the cache, which depends on
+    the text of the script and on everything the parsing depends on: the keywords
+    and labels of the naive method, or the weights of the model of the ml method.
+
+    Args:
+        script_text (str): text of the script
+        config (dict): config yaml file imported as a dict
+        with_ml (bool, optional): whether the script is parsed with the ml method.
+            Defaults to False.
+
+    Returns:
+        Union[str, None]: the key, or None if the parsing cannot be cached because
+            the parsing model has not been trained yet.
+    """
+    if with_ml:
+        method = {"method": "ml", "checkpoint": get_checkpoint_hash(config)}
+        if method["checkpoint"] is None:
+            return None
+    else:
+        method = {
+            "method": "naive",
+            "keywords": KEYWORDS_FAMILIES,
+            "labels_priority": [tag.name for tag in LABELS_PRIORITY],
+        }
+    method["version"] = CACHE_VERSION
+    method["labels"] = [tag.name for tag in LABELS]
+    sha = hashlib.sha256(json.dumps(method, sort_keys=True).encode("utf-8"))
+    sha.update(script_text.encode("utf-8", errors="surrogatepass"))
+    return sha.hexdigest()
+
+
+def get_cache_path(config: dict, key: str) -> str:
+    return os.path.join(config["parse_cache"]["folder"], f"{key}.npz")
+
+
+def load_cached_parsing(
+    script_text: str, config: dict, with_ml: bool = False
+) -> Union[Tuple[np.ndarray, np.ndarray], None]:
+    """Returns the parsing of a script saved in the cache, if there is one.
+
+    Args:
+        script_text (str): text of the script
+        config (dict): config yaml file imported as a dict
+        with_ml (bool, optional): whether the script is parsed with the ml method.
+            Defaults to False.
+
+    Returns:
+        Union[Tuple[np.ndarray, np.ndarray], None]: the number of lines of each
+            scene and the label codes of all the lines, or None if the parsing is
+            not in the cache.
+    """
+    if not is_cache_enabled(config):
+        return None
+    key = get_cache_key(script_text, config, with_ml)
+    if key is None:
+        return None
+    cache_path = get_cache_path(config, key)
+    try:
+        with np.load(cache_path) as cached:
+            scenes_sizes, tags = cached["scenes_sizes"], cached["tags"]
+    except (OSError, KeyError, ValueError):
+        return None
+    # the modification time of the files is used to evict the least recently used
+    try:
+        os.utime(cache_path)
+    except FileNotFoundError:  # removed by another process in the meantime
+        pass
+    return scenes_sizes, tags
+
+
+def save_parsing(
+    script_text: str,
+    config: dict,
+    scenes_sizes: np.ndarray,
+    tags: np.ndarray,
+    with_ml: bool = False,
+):
+    """Saves the parsing of a script in the cache, then evicts the least recently
+    used parsings if the cache is bigger than config["parse_cache"]["max_size_mb"].
+
+    Args:
+        script_text (str): text of the script
+        config (dict): config yaml file imported as a dict
+        scenes_sizes (np.ndarray): number of lines of each scene
+        tags (np.ndarray): label codes of all the lines of the script
+        with_ml (bool, optional): whether the script was parsed with the ml method.
+            Defaults to False.
+    """
+    if not is_cache_enabled(config):
+        return
+    key = get_cache_key(script_text, config, with_ml)
+    if key is None:
+        return
+    cache_path = get_cache_path(config, key)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # written under another name then renamed, so that a parsing being written
+    # cannot be read by another process
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        np.savez(f, scenes_sizes=np.asarray(scenes_sizes, dtype=np.int32), tags=tags)
+    try:
+        replaced_size = os.path.getsize(cache_path)
+    except FileNotFoundError:
+        replaced_size = 0
+    added_size = os.path.getsize(temporary_path) - replaced_size
+    os.replace(temporary_path, cache_path)
+
+    folder = config["parse_cache"]["folder"]
+    max_size = config["parse_cache"]["max_size_mb"] * 1024 * 1024
+    if folder in _tracked_sizes:
+        _tracked_sizes[folder] += added_size
+        if _tracked_sizes[folder] <= max_size:
+            return
+    _tracked_sizes[folder] = evict_least_recently_used(config)
+
+
+def evict_least_recently_used(config: dict) -> int:
+    """Removes the least recently used parsings from the cache if its size is above
+    config["parse_cache"]["max_size_mb"], and returns the size left. The cache is
+    brought down to 90% of this size so that the next saves do not scan it again."""
+    max_size = config["parse_cache"]["max_size_mb"] * 1024 * 1024
+    entries = []
+    total_size = 0
+    with os.scandir(config["parse_cache"]["folder"]) as it:
+        for entry in it:
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_size += stat.st_size
+    if total_size <= max_size:
+        return total_size
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+        if total_size <= 0.9 * max_size:
+            break
+    return total_size
+
+
+def clear_cache(config: dict) -> int:
+    """Removes all the parsings saved in the cache, and returns their number."""
+    folder = config["parse_cache"]["folder"]
+    _tracked_sizes.pop(folder, None)
+    if not os.path.isdir(folder):
+        return 0
+    nb_removed = 0
+    for name in os.listdir(folder):
+        if name.endswith(".npz") or name.endswith(".tmp"):
+            os.remove(os.path.join(folder, name))
+            nb_removed += 1
+    return nb_removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parameters_path", type=str, default="parameters.yaml")
+    parser.add_argument(
+        "--clear", action="store_true", help="remove all the cached parsings"
+    )
+    args = parser.parse_args()
+
+    config = configue.load(args.parameters_path)
+    if args.clear:
+        print(f"Removed {clear_cache(config)} cached parsings.")
+    else:
+        parser.print_help()
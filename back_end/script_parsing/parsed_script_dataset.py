@@ -7,9 +7,9 @@ from typing import TYPE_CHECKING, List, Tuple, Union
 import pandas as pd
 import torch
 from torch.utils.data import DataLoader, random_split
-from tqdm import tqdm
 
-from script_parsing.naive_parsing import label, tag_script
+from script_parsing.batch_parsing import parse_corpus
+from script_parsing.naive_parsing import iter_tag_script, label
 
 if TYPE_CHECKING:
     from screenplay_classes import Script
@@ -47,7 +47,7 @@ def get_df_coherent_scripts(
 
 
 def create_df_coherent_scripts(
-    coherent_scripts_path: str, dataset: pd.DataFrame, config: dict
+    coherent_scripts_path: str, dataset: pd.DataFrame, config: dict, workers: int = None
 ) -> Tuple[pd.DataFrame, List[Script]]:
     """Builds a dataframe containing whether each script was parsed
     coherently or not by the naive method. Returns the dataframe
@@ -57,6 +57,8 @@ def create_df_coherent_scripts(
         coherent_scripts_path (str): path to save the dataframe
         dataset (pd.DataFrame): bechdel dataset containing the path of the scripts
             for which we know the bechdel test value
+        workers (int, optional): number of processes parsing the scripts.
+            Defaults to the number of cores.
 
     Returns:
         Tuple[pd.DataFrame, List[Script]]: the first element of the tuple is
@@ -64,15 +66,22 @@ def create_df_coherent_scripts(
     """
     from screenplay_classes import Script
 
+    parsed_scripts = parse_corpus(
+        list(dataset["path"]), config, workers=workers, reparse_if_incoherent=False
+    )
     scripts = []
-    for path in tqdm(list(dataset["path"])):
-        script = Script.from_path(path, config)
-        script.load_scenes()
-        script.identify_characters()
-        script.check_parsing_is_coherent()
+    for parsed_script in parsed_scripts:
+        # scripts which could not be parsed are considered incoherently parsed
+        if parsed_script.error is not None:
+            print(f"Could not parse {parsed_script.path}: {parsed_script.error}")
+            continue
+        script = Script.from_path(parsed_script.path, config)
+        script.apply_parsing(parsed_script)
         scripts.append(script)
 
-    dataset["coherent parsing"] = [script.coherent_parsing for script in scripts]
+    dataset["coherent parsing"] = [
+        bool(parsed_script.coherent_parsing) for parsed_script in parsed_scripts
+    ]
     dataset.to_csv(coherent_scripts_path, index=True)
     return dataset, scripts
 
@@ -96,7 +105,7 @@ def create_lines_and_tags_df(config: dict) -> pd.DataFrame:
 
     if scripts_eventually is None:
         coherent_scripts_only["lines and tags"] = coherent_scripts_only["path"].apply(
-            tag_script
+            lambda path: tuple(map(list, zip(*iter_tag_script(path))))
         )
         coherent_scripts_only[["lines", "tags"]] = pd.DataFrame(
             coherent_scripts_only["lines and tags"].tolist(),
@@ -109,7 +118,7 @@ def create_lines_and_tags_df(config: dict) -> pd.DataFrame:
             if script.coherent_parsing
         ]
         coherent_scripts_only["tags"] = [
-            script.list_list_tags
+            [list(tags) for tags in script.list_list_tags]
             for script in scripts_eventually
             if script.coherent_parsing
         ]
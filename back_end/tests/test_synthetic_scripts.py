@@ -0,0 +1,65 @@
+"""Checks that the synthetic screenplays are a ground truth for the naive parsing and
+the Bechdel test. Run from back_end with `python -m pytest tests`."""
+
+import pickle
+
+import configue
+import pytest
+
+from dataset_building.synthetic_scripts import generate_screenplay
+from gender.gender_name import NAME_INDEX_VERSION
+from screenplay_classes import Script
+from script_parsing.naive_parsing import tag_script
+
+SEEDS = range(20)
+GENERATION_PARAMETERS = [
+    {},
+    {"nb_characters": 3},
+    {"nb_characters": 3, "nb_scenes": 1, "blocks_per_scene": 2},
+    {"nb_scenes": 2, "blocks_per_scene": 1},
+    {"nb_characters": 60, "nb_scenes": 10},
+    {"lines_of_dialogues_in_a_row": 3},
+]
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = configue.load("parameters.yaml")
+    # the genders of the characters are given by the user, so the name index is empty
+    config["paths"]["input_folder_name"] = str(tmp_path)
+    with open(tmp_path / config["names"]["name_index"], "wb") as f:
+        pickle.dump({"version": NAME_INDEX_VERSION, "name_index": {}}, f)
+    config["parse_cache"]["enabled"] = False
+    config["coref_cache"]["enabled"] = False
+    config["used_methods"]["reparse_with_ml"] = False
+    return config
+
+
+@pytest.mark.parametrize("parameters", GENERATION_PARAMETERS)
+def test_naive_parsing_gives_back_the_tags(parameters):
+    for seed in SEEDS:
+        script = generate_screenplay(seed=seed, **parameters)
+        _, tags = tag_script(script.text)
+        assert [tag for scene_tags in tags for tag in scene_tags] == script.tags, seed
+
+
+@pytest.mark.parametrize("parameters", GENERATION_PARAMETERS)
+def test_bechdel_score_is_the_ground_truth(parameters, config):
+    lines_of_dialogues_in_a_row = parameters.get("lines_of_dialogues_in_a_row", 2)
+    for seed in SEEDS:
+        synthetic_script = generate_screenplay(seed=seed, **parameters)
+        script = Script(synthetic_script.text, config)
+        script.load_format()
+        results = script.bechdel_all_rules(
+            list(range(2, lines_of_dialogues_in_a_row + 1)),
+            synthetic_script.user_genders,
+        )
+        for rules, result in results.items():
+            assert result.score == synthetic_script.bechdel_score, (seed, rules)
+
+        script.bechdel(synthetic_script.user_genders)
+        assert script.computed_score == synthetic_script.bechdel_score, seed
+
+
+def test_generation_is_reproducible():
+    assert generate_screenplay(seed=3) == generate_screenplay(seed=3)
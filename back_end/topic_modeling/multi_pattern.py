@@ -0,0 +1,96 @@
+import re
+from typing import Iterable, List, Set
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton over a set of strings, finding which of them occur in
+    a text in a single scan of the text, whatever the number of strings."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        # the empty string occurs in any text, it is not part of the automaton
+        self.has_empty_pattern = False
+        # transitions, failure links, index of the pattern ending at each state (or
+        # -1) and closest state on the failure links where a pattern ends (or 0)
+        self.goto: List[dict] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[int] = [-1]
+        self.output_link: List[int] = [0]
+
+        for pattern in dict.fromkeys(patterns):
+            if pattern == "":
+                self.has_empty_pattern = True
+            else:
+                self._add_pattern(pattern)
+        self._build_failure_links()
+        # in the initial state, the characters which don't begin a pattern are
+        # skipped at once with a regex
+        self.first_characters = None
+        if self.goto[0]:
+            self.first_characters = re.compile(
+                "[" + "".join(re.escape(letter) for letter in self.goto[0]) + "]"
+            )
+
+    def _add_pattern(self, pattern: str):
+        state = 0
+        for letter in pattern:
+            if letter not in self.goto[state]:
+                self.goto[state][letter] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(-1)
+                self.output_link.append(0)
+            state = self.goto[state][letter]
+        self.output[state] = len(self.patterns)
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self):
+        # breadth first, so that the failure link of a state is computed before
+        # the states deeper in the automaton
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for letter, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and letter not in self.goto[fail]:
+                    fail = self.fail[fail]
+                if letter in self.goto[fail]:
+                    fail = self.goto[fail][letter]
+                self.fail[next_state] = fail
+                self.output_link[next_state] = (
+                    fail if self.output[fail] != -1 else self.output_link[fail]
+                )
+
+    def find_all(self, text: str) -> Set[str]:
+        """Returns the patterns which occur in the text."""
+        found = {""} if self.has_empty_pattern else set()
+        if self.first_characters is None:
+            return found
+        goto, fail, output, output_link = (
+            self.goto,
+            self.fail,
+            self.output,
+            self.output_link,
+        )
+        # states whose patterns (and the ones on their failure links) were found
+        reported = [False] * len(goto)
+        state = 0
+        position = 0
+        while position < len(text):
+            if state == 0:
+                match = self.first_characters.search(text, position)
+                if match is None:
+                    break
+                position = match.start()
+            letter = text[position]
+            while state and letter not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(letter, 0)
+            position += 1
+
+            output_state = state if output[state] != -1 else output_link[state]
+            while output_state and not reported[output_state]:
+                reported[output_state] = True
+                found.add(self.patterns[output[output_state]])
+                output_state = output_link[output_state]
+        return found
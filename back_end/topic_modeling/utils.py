@@ -1,5 +1,8 @@
 import json
 import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
 
 
 def import_masculine_words(config):
@@ -11,6 +14,190 @@ def import_masculine_words(config):
     return masculine_words
 
 
+class MasculineLexicon:
+    """Words about men for a script: the masculine words along with the names of
+    its male characters, built once and shared by all its dialogues."""
+
+    def __init__(self, masculine_words: Iterable[str], males_names: Iterable[str]):
+        # in order, since the buzz words are searched in this order
+        self.words = tuple(dict.fromkeys([*masculine_words, *males_names]))
+        self.words_set = frozenset(self.words)
+        self.words_ranks = {word: rank for rank, word in enumerate(self.words)}
+        # words made of several words (or of none) can't be found word by word
+        self.has_phrases = any(word == "" or " " in word for word in self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words_set
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def is_in(self, words: Iterable[str]) -> bool:
+        """Returns whether one of the words is about men."""
+        return not self.words_set.isdisjoint(words)
+
+    def find_spans(self, line: str) -> List[Tuple[int, int, str]]:
+        """Finds the words about men in a line of dialogue.
+
+        Args:
+            line (str): line of dialogue
+
+        Returns:
+            List[Tuple[int, int, str]]: the position in the line of the beginning of
+                each word about men found, the position of its end plus one, and the
+                word, sorted by word (in the order of the lexicon) then by position.
+        """
+        clean_line = clean_text(line, strip=False, add_spaces_to_extremities=True)
+        if self.has_phrases:
+            return self._find_spans_by_blanking(clean_line)
+        spans = []
+        # position of the word in clean_line, which has an added space at its
+        # beginning, so it is the position of the word in the line plus one
+        position = 0
+        for word in clean_line.split(" "):
+            if word in self.words_set:
+                spans.append((position - 1, position + len(word), word))
+            position += len(word) + 1
+        spans.sort(key=lambda span: self.words_ranks[span[2]])
+        return spans
+
+    def _find_spans_by_blanking(self, clean_line: str) -> List[Tuple[int, int, str]]:
+        # each word found is replaced by spaces in the line, so that the words
+        # searched after can't be found in it
+        spans = []
+        for word in self.words:
+            count = 0
+            while (
+                " " + word + " " in clean_line
+            ):  # to make sure word is not included in another word (Example: 'he' is in "Where have you been ?!")
+                index_start = clean_line.index(
+                    " " + word + " "
+                )  # a shift (decalage) is induced by the added space in clean_line
+                index_end = index_start + len(word) + 1
+                spans.append((index_start, index_end, word))
+                clean_line = (
+                    clean_line[: index_start + 1]
+                    + " " * len(word)
+                    + clean_line[index_end:]
+                )
+                count += 1
+                if count > 1000:
+                    raise ValueError("Code likely stuck in this while loop")
+        return spans
+
+
+class TokenizedDialogues:
+    """Dialogues of a script tokenized once, each distinct token being interned as an
+    id. The tokens of each line (cleaned as in MasculineLexicon.find_spans) and of each
+    whole dialogue (cleaned as in Dialogue.clean_speech_text) are stored in arrays of ids,
+    delimited by offsets, so that the words about men are found with array operations.
+    """
+
+    def __init__(self, dialogues: Iterable[List[str]]):
+        self.vocabulary: Dict[str, int] = {}
+        self.words: List[str] = []
+        line_token_ids, line_token_starts, dialogue_token_ids = [], [], []
+        self.line_offsets = [0]
+        self.dialogue_line_offsets = [0]
+        self.dialogue_offsets = [0]
+        for speech_list in dialogues:
+            first_token = len(line_token_ids)
+            for line in speech_list:
+                position = 0
+                for word in clean_text(line, strip=False).split(" "):
+                    line_token_ids.append(self._intern(word))
+                    line_token_starts.append(position)
+                    position += len(word) + 1
+                self.line_offsets.append(len(line_token_ids))
+            self.dialogue_line_offsets.append(len(self.line_offsets) - 1)
+
+            # the lines joined by spaces have the tokens of each line one after the
+            # other, unless the stripping of the whole dialogue removes some of them
+            speech_text = " ".join(speech_list)
+            if speech_text == speech_text.strip():
+                dialogue_token_ids += line_token_ids[first_token:]
+            else:
+                dialogue_token_ids += [
+                    self._intern(word) for word in clean_text(speech_text).split(" ")
+                ]
+            self.dialogue_offsets.append(len(dialogue_token_ids))
+
+        self.line_token_ids = np.array(line_token_ids, dtype=np.int32)
+        self.line_token_starts = np.array(line_token_starts, dtype=np.int32)
+        self.dialogue_token_ids = np.array(dialogue_token_ids, dtype=np.int32)
+        self._lexicon: MasculineLexicon = None
+        self._about_men: np.ndarray = None
+        self._ranks_lexicon: MasculineLexicon = None
+        self._ranks: np.ndarray = None
+
+    def _intern(self, word: str) -> int:
+        token_id = self.vocabulary.get(word)
+        if token_id is None:
+            token_id = self.vocabulary[word] = len(self.words)
+            self.words.append(word)
+        return token_id
+
+    def _lexicon_ranks(self, lexicon: MasculineLexicon) -> np.ndarray:
+        # rank in the lexicon of each token of the vocabulary, -1 if it is not in it,
+        # kept for the lexicon since find_spans is called for each dialogue
+        if self._ranks_lexicon is not lexicon:
+            self._ranks = np.full(len(self.words), -1, dtype=np.int32)
+            for rank, word in enumerate(lexicon.words):
+                token_id = self.vocabulary.get(word)
+                if token_id is not None:
+                    self._ranks[token_id] = rank
+            self._ranks_lexicon = lexicon
+        return self._ranks
+
+    def about_men(self, lexicon: MasculineLexicon) -> np.ndarray:
+        """Returns whether each dialogue contains a word about men."""
+        # computed for all the dialogues at once, and kept for the lexicon
+        if self._lexicon is not lexicon:
+            is_about_men = self._lexicon_ranks(lexicon)[self.dialogue_token_ids] >= 0
+            # each dialogue has at least one token, maybe empty
+            self._about_men = (
+                np.logical_or.reduceat(is_about_men, self.dialogue_offsets[:-1])
+                if len(is_about_men)
+                else np.zeros(0, dtype=bool)
+            )
+            self._lexicon = lexicon
+        return self._about_men
+
+    def find_spans(
+        self, dialogue_index: int, lexicon: MasculineLexicon
+    ) -> List[List[Tuple[int, int, str]]]:
+        """Finds the words about men in each line of a dialogue, as
+        MasculineLexicon.find_spans does."""
+        first_line = self.dialogue_line_offsets[dialogue_index]
+        last_line = self.dialogue_line_offsets[dialogue_index + 1]
+        start = self.line_offsets[first_line]
+        end = self.line_offsets[last_line]
+        ranks = self._lexicon_ranks(lexicon)[self.line_token_ids[start:end]]
+        found = np.flatnonzero(ranks >= 0)
+        lines_spans = [[] for _ in range(last_line - first_line)]
+        if len(found) == 0:
+            return lines_spans
+        # sorted by rank then by position, since the sort is stable
+        found = found[np.argsort(ranks[found], kind="stable")]
+        lines = (
+            np.searchsorted(
+                self.line_offsets[first_line:last_line], found + start, "right"
+            )
+            - 1
+        )
+        for token, line in zip(found.tolist(), lines.tolist()):
+            word = self.words[self.line_token_ids[start + token]]
+            # the position in the line, which MasculineLexicon.find_spans counts
+            # from the added space at its beginning
+            position = int(self.line_token_starts[start + token])
+            lines_spans[line].append((position, position + len(word) + 1, word))
+        return lines_spans
+
+
+# each punctuation sign is replaced by a space
+PUNCTUATION_TABLE = str.maketrans(".,;?!():'", " " * 9)
+
+
 def clean_text(string, strip=True, add_spaces_to_extremities=False):
     if strip:
         string = string.strip()
@@ -18,15 +205,7 @@ def clean_text(string, strip=True, add_spaces_to_extremities=False):
     if add_spaces_to_extremities:
         string = " " + string + " "
 
-    clean_string = string.replace(".", " ")
-    clean_string = clean_string.replace(",", " ")
-    clean_string = clean_string.replace(";", " ")
-    clean_string = clean_string.replace("?", " ")
-    clean_string = clean_string.replace("!", " ")
-    clean_string = clean_string.replace("(", " ")
-    clean_string = clean_string.replace(")", " ")
-    clean_string = clean_string.replace(":", " ")
-    clean_string = clean_string.replace("'", " ")
+    clean_string = string.translate(PUNCTUATION_TABLE)
 
     clean_string = clean_string.lower()
 